@@ -0,0 +1,93 @@
+"""
+Time-axis alignment of price series for multi-ticker charts.
+
+Providers return series with different sampling rates (Polygon minute or
+daily bars, CoinGecko's automatic granularity) and different start times.
+align_series() resamples all of them onto one shared timestamp grid and
+returns a dense (tickers x time) price matrix, so normalization, axis
+labels and plotting all work on the same columns.
+
+When the finest series has more points than the figure can show, the grid
+is made of pixel-wide time buckets with two columns each, holding every
+series' bucket minimum and maximum in the order they occurred, so all
+visible extremes survive. Otherwise series are linearly interpolated onto
+a grid at the finest series' sampling interval. Outside a series' own time
+range its row is NaN, which leaves a gap instead of a flat line. A series
+too sparse to span a grid column (a single point, or points between two
+columns) is snapped onto its nearest columns instead of vanishing.
+"""
+
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+def align_series(all_timestamps: List[np.ndarray], all_prices: List[np.ndarray],
+                 max_points: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Resample series onto a shared grid; returns (grid timestamps, price matrix)."""
+    start = min(int(timestamps[0]) for timestamps in all_timestamps)
+    end = max(int(timestamps[-1]) for timestamps in all_timestamps)
+
+    steps = [np.median(np.diff(timestamps)) for timestamps in all_timestamps if len(timestamps) > 1]
+    step = min(steps) if steps else 0
+    size = int((end - start) // step) + 1 if step > 0 else 1
+
+    if max_points and size > max_points and max_points >= 2:
+        return _align_extremes(all_timestamps, all_prices, start, end, max_points // 2)
+
+    grid = np.linspace(start, end, size).astype(np.int64)
+    matrix = np.vstack([
+        np.interp(grid, timestamps, prices, left=np.nan, right=np.nan)
+        for timestamps, prices in zip(all_timestamps, all_prices)
+    ])
+
+    # Rows left with less than a line segment are too sparse for interpolation
+    for row in np.flatnonzero((~np.isnan(matrix)).sum(axis=1) < 2):
+        matrix[row] = _snap(grid, all_timestamps[row], all_prices[row])
+    return grid, matrix
+
+
+def _snap(grid: np.ndarray, timestamps: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Place a series' points on their nearest grid columns, interpolating between them."""
+    right = np.clip(np.searchsorted(grid, timestamps), 0, len(grid) - 1)
+    left = np.maximum(right - 1, 0)
+    columns = np.where(timestamps - grid[left] < grid[right] - timestamps, left, right)
+
+    # Points sharing a column keep the latest price
+    last = np.append(columns[1:] != columns[:-1], True)
+    columns, values = columns[last], prices[last]
+
+    row = np.interp(grid, grid[columns], values, left=np.nan, right=np.nan)
+    if len(columns) == 1 and len(grid) > 1:
+        # A line needs two points, so hold a lone price for one more column
+        neighbour = columns[0] + 1 if columns[0] + 1 < len(grid) else columns[0] - 1
+        row[neighbour] = values[0]
+    return row
+
+
+def _align_extremes(all_timestamps: List[np.ndarray], all_prices: List[np.ndarray],
+                    start: int, end: int, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Align series onto time buckets holding each bucket's minimum and maximum."""
+    edges = np.linspace(start, end, buckets + 1)
+    width = edges[1] - edges[0]
+    # Two columns per bucket, at its first and third quarter
+    grid = (edges[:-1, None] + width * np.array([0.25, 0.75])).ravel().astype(np.int64)
+
+    matrix = np.empty((len(all_prices), 2 * buckets))
+    for row, (timestamps, prices) in enumerate(zip(all_timestamps, all_prices)):
+        # Buckets the series has no points in are interpolated from its neighbours
+        values = np.interp(grid, timestamps, prices, left=np.nan, right=np.nan).reshape(buckets, 2)
+
+        # Group consecutive points by bucket (timestamps are sorted)
+        index = np.minimum(np.searchsorted(edges, timestamps, side="right") - 1, buckets - 1)
+        starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+        ends = np.r_[starts[1:], len(prices)]
+        low = np.minimum.reduceat(prices, starts)
+        high = np.maximum.reduceat(prices, starts)
+
+        # Draw the extremes in the direction the bucket moved
+        rising = prices[ends - 1] >= prices[starts]
+        values[index[starts], 0] = np.where(rising, low, high)
+        values[index[starts], 1] = np.where(rising, high, low)
+        matrix[row] = values.ravel()
+
+    return grid, matrix
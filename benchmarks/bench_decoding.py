@@ -0,0 +1,91 @@
+"""
+Benchmark for decoding provider responses into NumPy columns.
+
+Compares json.loads plus per-point list comprehensions with the columnar
+decoders in decoding.py, for a 50k-bar Polygon body and a 50k-point
+CoinGecko body. Reports best-of-N time and tracemalloc peak memory.
+
+Usage:
+    python benchmarks/bench_decoding.py
+"""
+
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Callable
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decoding import decode_coingecko_prices, decode_polygon_bars
+
+POINTS = 50_000
+REPEAT = 5
+
+
+def polygon_body() -> bytes:
+    """Build a Polygon aggregates body shaped like a minute-bar response."""
+    start = 1_700_000_000_000
+    results = [
+        {"v": 12.5 + i, "vw": 101.2345, "o": 101.1, "c": 101.0 + (i % 500) * 0.01,
+         "h": 101.5, "l": 100.9, "t": start + i * 60_000, "n": 42}
+        for i in range(POINTS)
+    ]
+    return json.dumps({
+        "ticker": "X:BTCUSD", "queryCount": POINTS, "resultsCount": POINTS,
+        "adjusted": True, "results": results, "status": "OK", "request_id": "bench"
+    }).encode()
+
+
+def coingecko_body() -> bytes:
+    """Build a CoinGecko market_chart body with prices, caps and volumes."""
+    start = 1_700_000_000_000
+    points = [[start + i * 300_000, 27_000.123456789 + i * 0.5] for i in range(POINTS)]
+    return json.dumps({"prices": points, "market_caps": points, "total_volumes": points}).encode()
+
+
+def polygon_before(body: bytes):
+    """Decode a Polygon body the old way."""
+    results = json.loads(body)["results"]
+    return np.array([r["t"] for r in results]), np.array([r["c"] for r in results])
+
+
+def coingecko_before(body: bytes):
+    """Decode a CoinGecko body the old way."""
+    prices = json.loads(body)["prices"]
+    return np.array([p[0] for p in prices]), np.array([p[1] for p in prices])
+
+
+def measure(func: Callable, body: bytes):
+    """Return (best time in ms, peak traced memory in MB)."""
+    best = min(timeit.repeat(lambda: func(body), number=1, repeat=REPEAT))
+    tracemalloc.start()
+    func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024
+
+
+def main() -> None:
+    """Run the benchmark and print a comparison."""
+    cases = [
+        ("polygon", polygon_body(), polygon_before, decode_polygon_bars),
+        ("coingecko", coingecko_body(), coingecko_before, decode_coingecko_prices),
+    ]
+
+    print(f"Decoding {POINTS} points (best of {REPEAT}):")
+    for name, body, before, after in cases:
+        expected, actual = before(body), after(body)
+        assert (expected[0] == actual[0]).all() and (expected[1] == actual[1]).all()
+
+        before_ms, before_mb = measure(before, body)
+        after_ms, after_mb = measure(after, body)
+        print(f"  {name} ({len(body) / 1024 / 1024:.1f} MB body)")
+        print(f"    before: {before_ms:8.2f} ms  peak {before_mb:7.2f} MB")
+        print(f"    after:  {after_ms:8.2f} ms  peak {after_mb:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
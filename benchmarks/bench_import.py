@@ -0,0 +1,93 @@
+"""
+Benchmark for cold-start import time.
+
+Imports each entry module in a fresh interpreter with `python -X importtime`
+and reports the median total import time, plus the slowest direct imports
+of that module (cumulative time, so a package includes its dependencies).
+Also reports whether matplotlib was loaded, since the bot process should
+leave it to the render workers.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat N] [--top N] [module ...]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["stonks", "bot", "github_actions"]
+
+
+def import_once(module: str) -> Tuple[int, Dict[str, int], bool]:
+    """Import a module in a new interpreter; returns (total us, direct imports us, matplotlib loaded)."""
+    code = f"import sys, {module}; print('matplotlib' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    total = 0
+    children: Dict[str, int] = {}
+    pending: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+
+        # Imports are listed after everything they import, indented one level deeper
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            pending[name.strip()] = int(cumulative)
+        elif depth == 0:
+            if name.strip() == module:
+                total = int(cumulative)
+                children = pending
+            pending = {}
+
+    return total, children, result.stdout.strip() == "True"
+
+
+def benchmark(module: str, repeat: int, top: int) -> None:
+    """Print the import time report for one module."""
+    totals: List[int] = []
+    children: Dict[str, List[int]] = {}
+    matplotlib_loaded = False
+
+    for _ in range(repeat):
+        total, direct, loaded = import_once(module)
+        totals.append(total)
+        matplotlib_loaded |= loaded
+        for name, micros in direct.items():
+            children.setdefault(name, []).append(micros)
+
+    slowest = sorted(
+        ((statistics.median(samples), name) for name, samples in children.items()),
+        reverse=True
+    )[:top]
+
+    print(f"import {module}: {statistics.median(totals) / 1000:.1f} ms "
+          f"(median of {repeat}), matplotlib {'loaded' if matplotlib_loaded else 'not loaded'}")
+    for micros, name in slowest:
+        print(f"  {name:<30} {micros / 1000:8.1f} ms")
+
+
+def main() -> None:
+    """Run the benchmark for the requested modules."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=8, help="slowest direct imports to list")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        benchmark(module, args.repeat, args.top)
+
+
+if __name__ == "__main__":
+    main()
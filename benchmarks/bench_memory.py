@@ -0,0 +1,103 @@
+"""
+Benchmark for the memory used by fetched price series.
+
+Fetches a 10-ticker, 60-day chart request through the fixture server (see
+fixtures.py) and reports, with tracemalloc:
+
+    series      bytes held by the fetched PriceSeries
+    as tuples   what the old (prices, readable_dates, timestamps) tuples
+                would hold, with a formatted date label per point
+    prepare     peak allocations while aligning the series into ChartData
+    request     peak allocations for the whole get_chart_data call
+
+Usage:
+    python benchmarks/bench_memory.py [--days N] [--tickers N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tracemalloc
+from typing import Callable, List, Tuple
+
+# The benchmark never touches the local price store or shared cache and needs a Polygon key to pass validation
+os.environ["PRICE_STORE_PATH"] = ""
+os.environ["SHARED_CACHE_URL"] = ""
+os.environ.setdefault("POLYGON", "fixture")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stonks
+from fixtures import make_chart, start_server
+from price_series import PriceSeries
+
+TICKERS = ["BTC", "X:BTCUSD", "ETH", "X:ETHUSD", "XMR", "X:SOLUSD", "AVAX", "ADA", "DOT", "LINK"]
+DAYS = 60
+
+
+def traced(func: Callable, *args) -> Tuple[object, int]:
+    """Call func and return its result and peak traced allocations in bytes."""
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def tuple_bytes(series: PriceSeries) -> int:
+    """Bytes the old tuple of prices, per-point date labels and timestamps would hold."""
+    labels = stonks.format_date_labels(series.dates)
+    return series.prices.nbytes + labels.nbytes + series.timestamps.nbytes
+
+
+def main() -> None:
+    """Run the benchmark and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=DAYS)
+    parser.add_argument("--tickers", type=int, default=len(TICKERS))
+    args = parser.parse_args()
+
+    tickers = TICKERS[:args.tickers]
+    points = stonks.target_points(stonks.FIGURE_SIZE[0], 300)
+
+    server, base_url = start_server()
+    chart = make_chart(base_url)
+    loop = asyncio.new_event_loop()
+
+    async def fetch() -> List[PriceSeries]:
+        return await asyncio.gather(*(
+            chart.fetch_prices(ticker, args.days, points)
+            for ticker in tickers
+        ))
+
+    try:
+        # Provider progress messages would drown out the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            # The measured series; fetching them also warms up the providers for the request below
+            series = loop.run_until_complete(fetch())
+            held = sum(item.nbytes for item in series)
+            _, prepare_peak = traced(chart.build_chart_data, args.days, tickers, series, points)
+            _, request_peak = traced(
+                loop.run_until_complete, chart.get_chart_data(args.days, tickers, points)
+            )
+    finally:
+        loop.close()
+        server.shutdown()
+
+    print(f"{len(tickers)} tickers x {args.days} days, {sum(len(item) for item in series)} points")
+    for item in series:
+        print(f"  {item.ticker:<10} {item.interval:<9} {len(item):>7} points")
+    as_tuples = sum(tuple_bytes(item) for item in series)
+    print(f"series:    {held / 1024:9.1f} KB")
+    print(f"as tuples: {as_tuples / 1024:9.1f} KB ({as_tuples / held:.1f}x)")
+    print(f"prepare:   {prepare_peak / 1024:9.1f} KB peak")
+    print(f"request:   {request_peak / 1024:9.1f} KB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark for timestamp parsing and date label formatting.
+
+Compares the old per-point datetime.strftime conversion with the
+datetime64 view plus tick-only label formatting, for a 50k-point series.
+
+Usage:
+    python benchmarks/bench_timestamps.py
+"""
+
+import datetime
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import TICKS_NUM
+from stonks import format_date_labels
+
+POINTS = 50_000
+REPEAT = 5
+
+
+def before(raw_timestamps: list) -> np.ndarray:
+    """Parse timestamps and format a label for every point."""
+    timestamps = np.array(raw_timestamps)
+    readable_dates = np.array([
+        datetime.datetime.fromtimestamp(ts / 1000, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
+        for ts in timestamps
+    ])
+    ticks = np.int32(np.linspace(0, timestamps.shape[0] - 1, TICKS_NUM))
+    return readable_dates[ticks]
+
+
+def after(raw_timestamps: list) -> np.ndarray:
+    """Parse timestamps into datetime64 and format only the tick labels."""
+    timestamps = np.array(raw_timestamps, dtype=np.int64)
+    dates = timestamps.view("datetime64[ms]")
+    ticks = np.int32(np.linspace(0, timestamps.shape[0] - 1, TICKS_NUM))
+    return format_date_labels(dates[ticks])
+
+
+def main() -> None:
+    """Run the benchmark and print a comparison."""
+    start = 1_700_000_000_000
+    raw_timestamps = list(range(start, start + POINTS * 60_000, 60_000))
+
+    assert (before(raw_timestamps) == after(raw_timestamps)).all()
+
+    before_time = min(timeit.repeat(lambda: before(raw_timestamps), number=1, repeat=REPEAT))
+    after_time = min(timeit.repeat(lambda: after(raw_timestamps), number=1, repeat=REPEAT))
+
+    print(f"Parse + label cost for {POINTS} points (best of {REPEAT}):")
+    print(f"  before (strftime per point): {before_time * 1000:8.2f} ms")
+    print(f"  after  (datetime64 + ticks): {after_time * 1000:8.2f} ms")
+    print(f"  speedup: {before_time / after_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Provider response fixtures and a local stand-in API server for benchmarks.
+
+Fixtures are Polygon aggregates and CoinGecko market_chart bodies for
+each benchmark window, stored under benchmarks/fixtures/. They are
+recorded from the real APIs with --record (needs the usual POLYGON and
+COINGECKO keys), or otherwise synthesized with the same shape and size
+as the real responses (a seeded random walk).
+
+Usage:
+    python benchmarks/fixtures.py           # synthesize missing fixtures
+    python benchmarks/fixtures.py --record  # record fixtures from the live APIs
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import stonks
+from stonks import DAY_MS, FIGURE_SIZE, INTERVAL_MS, coingecko_interval, polygon_interval, target_points
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+WINDOWS = [1, 3, 14, 60, 365, 3650]
+POLYGON_LIMIT = 50_000
+# Bars are fetched at the interval a full-size chart would use
+CHART_POINTS = target_points(FIGURE_SIZE[0], 300)
+
+# Tickers used when recording from the live APIs
+RECORD_TICKERS = {"polygon": "X:AAPL", "coingecko": "BTC"}
+
+
+def fixture_path(provider: str, days: int) -> str:
+    """Get the fixture file for a provider and window."""
+    return os.path.join(FIXTURE_DIR, f"{provider}_{days}.json")
+
+
+def load_fixture(provider: str, days: int) -> bytes:
+    """Read a fixture body, synthesizing it first if it does not exist."""
+    path = fixture_path(provider, days)
+    if not os.path.exists(path):
+        write_fixture(provider, days, synthesize(provider, days))
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_fixture(provider: str, days: int, body: bytes) -> None:
+    """Store a fixture body."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(fixture_path(provider, days), "wb") as f:
+        f.write(body)
+
+
+def synthesize(provider: str, days: int) -> bytes:
+    """Build a response body with the same shape and size as the real API's."""
+    rng = np.random.default_rng(days)
+    end = int(time.time() * 1000)
+
+    if provider == "polygon":
+        step = INTERVAL_MS[polygon_interval(days, CHART_POINTS)]
+        count = min(days * DAY_MS // step, POLYGON_LIMIT)
+    else:
+        step = INTERVAL_MS[coingecko_interval(days)]
+        count = days * DAY_MS // step
+
+    timestamps, closes = _random_walk(rng, end - count * step, step, count)
+
+    if provider == "polygon":
+        results = [
+            {"v": round(float(v), 4), "vw": round(c * 1.0002, 4), "o": round(c * 0.999, 4),
+             "c": round(c, 4), "h": round(c * 1.002, 4), "l": round(c * 0.998, 4), "t": t, "n": int(v)}
+            for t, c, v in zip(timestamps, closes, rng.uniform(1, 500, count))
+        ]
+        body = {
+            "ticker": "AAPL", "queryCount": count, "resultsCount": count, "adjusted": True,
+            "results": results, "status": "OK", "request_id": "fixture", "count": count
+        }
+    else:
+        prices = [[t, c] for t, c in zip(timestamps, closes)]
+        body = {
+            "prices": prices,
+            "market_caps": [[t, c * 19_500_000] for t, c in prices],
+            "total_volumes": [[t, c * 650_000] for t, c in prices]
+        }
+
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def record() -> None:
+    """Record fixtures from the live APIs."""
+    chart = stonks.get_chart_instance()
+    for name in ("polygon", "coingecko"):
+        provider = chart.providers[name]
+        symbol = provider._resolve_symbol(RECORD_TICKERS[name])
+        for days in WINDOWS:
+            end_time = int(time.time() * 1000)
+            start_time = end_time - days * DAY_MS
+            if name == "polygon":
+                url = provider.range_url(symbol, provider.get_interval(days, CHART_POINTS), start_time, end_time)
+            else:
+                url = provider._with_api_key(
+                    f"{provider.base_url}/coins/{symbol}/market_chart?vs_currency=usd&days={days}"
+                )
+            write_fixture(name, days, provider._request(url))
+            print(f"Recorded {name} {days} days")
+
+
+def _random_walk(rng: np.random.Generator, start: int, step: int,
+                 count: int) -> Tuple[list, list]:
+    """Generate a positive random-walk price series."""
+    timestamps = (start + step * np.arange(1, count + 1)).tolist()
+    returns = rng.normal(0, 0.002 * np.sqrt(step / INTERVAL_MS["minute"]), count)
+    closes = (30_000 * np.exp(np.cumsum(returns))).tolist()
+    return timestamps, closes
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves fixtures for Polygon aggregates and CoinGecko market_chart URLs."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+
+        if "range" in parts and "aggs" in parts:
+            # .../range/{multiplier}/{timespan}/{start}/{end}
+            start, end = int(parts[-2]), int(parts[-1])
+            body = load_fixture("polygon", round((end - start) / DAY_MS))
+        elif parts[-1] == "market_chart" and "days" in query:
+            body = load_fixture("coingecko", int(query["days"][0]))
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server() -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stand-in API server on a free local port; returns (server, base URL)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_chart(base_url: str) -> stonks.StonksChart:
+    """Create a chart instance whose providers talk to the stand-in server."""
+    # The stand-in server has no rate limits
+    for provider_config in config.API_CONFIG.values():
+        provider_config["requests_per_minute"] = 1_000_000
+        provider_config["burst"] = 1_000_000
+
+    # Every fetch should reach the server rather than a window already held in memory
+    config.CACHE_CONFIG["series_buffer_max"] = 0
+
+    chart = stonks.StonksChart()
+    chart.providers["polygon"].base_url = f"{base_url}/v2/aggs"
+    chart.providers["coingecko"].base_url = f"{base_url}/api/v3"
+    return chart
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv[1:]:
+        record()
+    else:
+        for provider in ("polygon", "coingecko"):
+            for days in WINDOWS:
+                load_fixture(provider, days)
+        print(f"Fixtures ready in {FIXTURE_DIR}")
@@ -0,0 +1,188 @@
+"""
+End-to-end benchmark suite for the chart pipeline.
+
+Replays provider fixtures (see fixtures.py) through a local stand-in API
+server and times each stage separately for every window and ticker count:
+
+    get_historical_data       per-ticker fetch + decode
+    create_chart              full fetch, normalize and plot to a Figure
+    _create_matplotlib_chart  plotting prepared chart data
+    encode                    PNG encoding as sent by the bot (300 dpi)
+
+For each stage it reports p50/p99 latency and throughput, plus the peak
+RSS of the process. Results are written to benchmarks/results/ as JSON
+and can be compared against an earlier run with --compare.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--quick] [--repeat N] [--compare results/<file>.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+# Benchmarks never touch the local price store or shared cache and need a Polygon key to pass validation
+os.environ["PRICE_STORE_PATH"] = ""
+os.environ["SHARED_CACHE_URL"] = ""
+os.environ.setdefault("POLYGON", "fixture")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+import stonks
+from render import render_chart_timed
+from fixtures import WINDOWS, make_chart, start_server
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+TICKER_COUNTS = [1, 4, 10]
+TICKERS = ["BTC", "X:BTCUSD", "ETH", "X:ETHUSD", "XMR", "X:SOLUSD", "AVAX", "ADA", "DOT", "LINK"]
+REPEAT = 5
+
+QUICK_WINDOWS = [1, 14, 365]
+QUICK_TICKER_COUNTS = [1, 4]
+QUICK_REPEAT = 3
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Get the peak resident set size of this process in MB."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) as p50/p99 and throughput."""
+    values = np.array(samples)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(values, 99)) * 1000, 3),
+        "ops_per_second": round(len(values) / float(values.sum()), 3),
+        "samples": len(values)
+    }
+
+
+def timed(samples: List[float], func: Callable, *args):
+    """Call func, appending its duration to samples, and return its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def run_scenario(chart: stonks.StonksChart, loop: asyncio.AbstractEventLoop,
+                 days: int, tickers: List[str], repeat: int) -> Dict[str, dict]:
+    """Time every stage for one window and ticker set."""
+    fetch, create, plot, encode = [], [], [], []
+    points = stonks.target_points(stonks.FIGURE_SIZE[0], 300)
+
+    for _ in range(repeat):
+        for ticker in tickers:
+            provider, provider_ticker = chart._get_source(ticker)
+            timed(fetch, provider.get_historical_data, provider_ticker, days, points)
+
+        timed(create, loop.run_until_complete, chart.create_chart(days, tickers))
+
+        data = loop.run_until_complete(chart.get_chart_data(days, tickers, points))
+        timed(plot, chart._create_matplotlib_chart, data)
+        _, _, encode_seconds = render_chart_timed(data, "png", 300)
+        encode.append(encode_seconds)
+
+    return {
+        "get_historical_data": summarize(fetch),
+        "create_chart": summarize(create),
+        "_create_matplotlib_chart": summarize(plot),
+        "encode": summarize(encode)
+    }
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """Print p50 changes against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = {(s["days"], s["tickers"]): s["stages"] for s in json.load(f)["scenarios"]}
+
+    print(f"\nCompared with {baseline_path} (p50, negative is faster):")
+    for scenario in results["scenarios"]:
+        before = baseline.get((scenario["days"], scenario["tickers"]))
+        if before is None:
+            continue
+        changes = []
+        for stage, stats in scenario["stages"].items():
+            if stage in before and before[stage]["p50_ms"]:
+                change = stats["p50_ms"] / before[stage]["p50_ms"] - 1
+                changes.append(f"{stage} {change:+.1%}")
+        print(f"  {scenario['days']:>4} days x {scenario['tickers']:>2} tickers: " + ", ".join(changes))
+
+
+def main() -> None:
+    """Run the benchmark suite and store its results."""
+    parser = argparse.ArgumentParser(description="Benchmark the chart pipeline against recorded fixtures")
+    parser.add_argument("--quick", action="store_true", help="run a reduced set of scenarios")
+    parser.add_argument("--repeat", type=int, help="iterations per scenario")
+    parser.add_argument("--compare", metavar="RESULTS", help="compare with an earlier results file")
+    args = parser.parse_args()
+
+    windows = QUICK_WINDOWS if args.quick else WINDOWS
+    ticker_counts = QUICK_TICKER_COUNTS if args.quick else TICKER_COUNTS
+    repeat = args.repeat or (QUICK_REPEAT if args.quick else REPEAT)
+
+    server, base_url = start_server()
+    chart = make_chart(base_url)
+    loop = asyncio.new_event_loop()
+
+    scenarios = []
+    try:
+        for days in windows:
+            for count in ticker_counts:
+                tickers = TICKERS[:count]
+                # Provider progress messages would drown out the report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stages = run_scenario(chart, loop, days, tickers, repeat)
+                scenarios.append({"days": days, "tickers": count, "stages": stages})
+
+                print(f"{days:>4} days x {count:>2} tickers: " + ", ".join(
+                    f"{stage} p50 {stats['p50_ms']:.1f}ms p99 {stats['p99_ms']:.1f}ms"
+                    for stage, stats in stages.items()
+                ))
+    finally:
+        loop.close()
+        server.shutdown()
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "peak_rss_mb": peak_rss_mb(),
+        "scenarios": scenarios
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if results["peak_rss_mb"] is not None:
+        print(f"\nPeak RSS: {results['peak_rss_mb']:.1f} MB")
+    print(f"Results saved to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,22 +5,57 @@ This bot responds to Discord messages with price comparison charts
 using the stonks module.
 """
 
-from stonks import get_fig, DEFAULT_TICKERS, COMMAND_PREFIX, StonksError
-import matplotlib.pyplot as plt
+from stonks import (
+    get_chart_bytes, get_chart_cache, get_chart_instance, get_output_profile, get_renderer, chart_key,
+    DEFAULT_TICKERS, COMMAND_PREFIX, StonksError
+)
+from config import METRICS_CONFIG, SHARD_CONFIG, WARMER_CONFIG
+from http_client import get_http_client
+from metrics import metrics
+from profiles import choose_profile, get_profile_stats
+from scheduler import get_scheduler
+from warmer import get_warmer
+import asyncio
 import discord
 import os
 import io
 import logging
-from typing import Optional
+import time
+from typing import List, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def parse_shard_ids(value: str) -> Optional[List[int]]:
+    """Parse a shard list like "0-3" or "0,2,5"; empty means every shard."""
+    if not value.strip():
+        return None
+    shard_ids = []
+    for part in value.split(","):
+        first, _, last = part.strip().partition("-")
+        shard_ids.extend(range(int(first), int(last or first) + 1))
+    return shard_ids
+
+
+def create_client() -> discord.AutoShardedClient:
+    """Create the Discord client for the shards this process runs."""
+    intents = discord.Intents.default()
+    intents.message_content = True
+
+    shard_ids = parse_shard_ids(SHARD_CONFIG["shard_ids"])
+    if shard_ids is not None and SHARD_CONFIG["shard_count"] is None:
+        raise ValueError("SHARD_IDS needs SHARD_COUNT (the total number of shards) to be set")
+
+    # Without explicit shards, Discord picks the shard count and this process runs all of them
+    return discord.AutoShardedClient(
+        intents=intents, shard_count=SHARD_CONFIG["shard_count"], shard_ids=shard_ids
+    )
+
+
 # Discord bot configuration
-intents = discord.Intents.default()
-intents.message_content = True
-client = discord.Client(intents=intents)
+client = create_client()
 
 
 @client.event
@@ -39,55 +74,95 @@ async def on_message(message):
     
     logger.info(f"Received stonks command from {message.author}: {message.content}")
     
-    # Send initial response
-    await message.channel.send("Generating your stonks chart...")
-    
+    with metrics.request_profile(message.content):
+        await handle_command(message, command_parts)
+
+
+async def handle_command(message, command_parts) -> None:
+    """Generate and send the chart for one stonks command."""
     try:
+        # Output profile flags (--preview, --compact, --full) may appear anywhere
+        flags = [part[2:] for part in command_parts if part.startswith("--")]
+        command_parts = [part for part in command_parts if not part.startswith("--")]
+        profile = choose_profile(flags[-1] if flags else None)
+        options = get_output_profile(profile)
+        
         # Determine parameters
         if len(command_parts) == 1:
             # Default: 365 days with default tickers
-            fig = await get_fig("365", DEFAULT_TICKERS)
+            days, tickers = "365", DEFAULT_TICKERS
         elif len(command_parts) == 2:
             # Days specified, use default tickers
-            days = command_parts[1]
-            fig = await get_fig(days, DEFAULT_TICKERS)
+            days, tickers = command_parts[1], DEFAULT_TICKERS
         else:
             # Days and custom tickers specified
-            days = command_parts[1]
-            tickers = command_parts[2:]
-            fig = await get_fig(days, tickers)
+            days, tickers = command_parts[1], command_parts[2:]
+        
+        key = chart_key(days, tickers, profile)
+        
+        # Hot charts are usually already rendered; send them in a single upload
+        chart = await get_chart_cache().cached(key)
+        if chart is not None:
+            await send_chart(message.channel, chart, options["format"])
+            get_warmer().record(days, tickers)
+            metrics.inc("stonks_commands_total", status="ok")
+            return
+        
+        # Reject unknown tickers before any work is queued
+        await get_chart_instance().validate_tickers(tickers)
+        
+        # Queue the command; identical commands in flight share one chart
+        guild_id = message.guild.id if message.guild else None
+        future, position = get_scheduler().submit(
+            key,
+            message.author.id,
+            guild_id,
+            lambda: get_chart_bytes(days, tickers, profile)
+        )
+        
+        # Send initial response
+        if position:
+            await message.channel.send(f"Queued, position {position}. Your stonks chart is coming up...")
+        else:
+            await message.channel.send("Generating your stonks chart...")
+        
+        # Shield so a cancelled handler does not abort the chart for other waiters
+        chart = await asyncio.shield(future)
         
         # Send the chart
-        await send_chart(message.channel, fig)
+        await send_chart(message.channel, chart, options["format"])
+        # Only charts that were served count towards popularity, so failing commands are never warmed
+        get_warmer().record(days, tickers)
+        metrics.inc("stonks_commands_total", status="ok")
         
     except StonksError as e:
+        metrics.inc("stonks_commands_total", status="error")
         error_msg = f"Error generating chart: {str(e)}"
         logger.error(f"StonksError for user {message.author}: {e}")
         await message.channel.send(error_msg)
         
     except Exception as e:
+        metrics.inc("stonks_commands_total", status="unexpected_error")
         error_msg = f"Unexpected error: {str(e)}"
         logger.error(f"Unexpected error for user {message.author}: {e}", exc_info=True)
         await message.channel.send(error_msg)
 
 
-async def send_chart(channel, fig: plt.Figure) -> None:
-    """Send a matplotlib figure as a Discord file."""
+async def send_chart(channel, chart: bytes, format: str = "png") -> None:
+    """Send an encoded chart as a Discord file."""
     try:
-        # Create a bytes buffer for the image
-        buf = io.BytesIO()
-        
-        # Save the figure to the buffer with high quality
-        fig.savefig(buf, format='png', dpi=300, bbox_inches='tight')
-        buf.seek(0)
+        # Wrap the image rendered by the worker pool in a buffer
+        buf = io.BytesIO(chart)
         
-        # Send the file to Discord
-        file = discord.File(buf, filename="stonks_chart.png")
-        await channel.send("Here's your stonks chart!", file=file)
+        # Send the file to Discord, timing the upload for output profile selection
+        file = discord.File(buf, filename=f"stonks_chart.{format}")
+        start = time.perf_counter()
+        with metrics.span("upload"):
+            await channel.send("Here's your stonks chart!", file=file)
+        get_profile_stats().record_upload(len(chart), time.perf_counter() - start)
         
         # Clean up
         buf.close()
-        plt.close(fig)
         
     except Exception as e:
         logger.error(f"Error sending chart: {e}")
@@ -100,6 +175,14 @@ async def on_ready():
     logger.info(f"{client.user} is online and ready!")
     logger.info(f"Bot ID: {client.user.id}")
     logger.info(f"Connected to {len(client.guilds)} guild(s)")
+    logger.info(f"Running shard(s) {sorted(client.shards)} of {client.shard_count}")
+    
+    # Spawn a render worker (which imports matplotlib) now rather than on the first command
+    get_renderer().start()
+    
+    # Keep popular charts rendered in the background
+    if WARMER_CONFIG["enabled"]:
+        get_warmer().start()
     
     # Set bot status
     await client.change_presence(
@@ -125,6 +208,12 @@ def main():
         logger.error("DISCORD_TOKEN environment variable not set!")
         return
     
+    if metrics.enabled:
+        metrics.add_collector(get_http_client().gauges)
+        metrics.add_collector(get_scheduler().gauges)
+        metrics.add_collector(get_chart_instance().health.gauges)
+        metrics.start_server(METRICS_CONFIG["host"], METRICS_CONFIG["port"])
+    
     try:
         # Run the bot
         logger.info("Starting Discord bot...")
@@ -0,0 +1,168 @@
+"""
+Rendered chart cache for Stonks Bot.
+
+Keeps recently encoded charts in memory so repeated commands skip the
+fetch/plot/encode pipeline, and coalesces concurrent identical requests
+onto a single in-flight render. With a shared cache (see shared_cache.py)
+finished renders are also published for the other bot processes, and a
+local miss checks there before rendering. Backend calls block, so they
+run on a helper thread; a lookup the backend does not answer in time is
+treated as a miss rather than holding up the event loop.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from metrics import metrics
+from shared_cache import SharedCache
+
+
+class ChartCache:
+    """LRU cache of encoded charts with per-entry TTLs and a memory budget."""
+
+    def __init__(self, max_bytes: int, shared: Optional[SharedCache] = None, timeout: float = 0.5):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.timeout = timeout
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # Backend calls block; each backend has one connection, so one thread is enough
+        self._executor = None
+        if shared is not None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return a cached chart, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: bytes, ttl: float) -> None:
+        """Store a chart, evicting least recently used entries to fit the budget."""
+        if len(value) > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size += len(value)
+
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def cached(self, key: Hashable) -> Optional[bytes]:
+        """Return a fresh cached chart, counting it as a cache hit."""
+        value = self.get(key)
+        result = "hit"
+        if value is None and self.shared is not None:
+            await self._adopt_shared(key)
+            value = self.get(key)
+            result = "shared_hit"
+        if value is not None:
+            self.hits += 1
+            metrics.inc("stonks_chart_cache_total", result=result)
+        return value
+
+    async def expires_in(self, key: Hashable) -> Optional[float]:
+        """Get the seconds until a cached chart expires, or None if it is not cached."""
+        if self.shared is not None:
+            await self._adopt_shared(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0] - time.monotonic()
+
+    async def claim(self, key: Hashable, seconds: float) -> bool:
+        """Claim a background render across processes; False if another process has it."""
+        if self.shared is None:
+            return True
+        # Without an answer from the backend every process does its own work
+        return await self._call_shared(True, self.shared.add, f"claim:{key!r}", b"1", seconds)
+
+    async def get_or_create(self, key: Hashable,
+                            factory: Callable[[], Awaitable[Tuple[bytes, float]]]) -> bytes:
+        """Return a cached chart or render it once for all concurrent callers; factory returns (chart, ttl)."""
+        value = await self.cached(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            metrics.inc("stonks_chart_cache_total", result="miss")
+            task = self._start(key, factory)
+        else:
+            metrics.inc("stonks_chart_cache_total", result="coalesced")
+
+        # Shield so one cancelled waiter does not abort the render for the others
+        value, _ = await asyncio.shield(task)
+        return value
+
+    async def refresh(self, key: Hashable,
+                      factory: Callable[[], Awaitable[Tuple[bytes, float]]]) -> bytes:
+        """Re-render a chart even if it is cached, joining any render already in flight."""
+        task = self._inflight.get(key) or self._start(key, factory)
+        value, _ = await asyncio.shield(task)
+        return value
+
+    def _start(self, key: Hashable,
+               factory: Callable[[], Awaitable[Tuple[bytes, float]]]) -> asyncio.Task:
+        """Start a render that caches its result when done."""
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """Cache a finished render and release its in-flight slot."""
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            value, ttl = task.result()
+            self.put(key, value, ttl)
+            if self.shared is not None:
+                # Published in the background; nobody waits for it
+                self._executor.submit(self.shared.set, f"chart:{key!r}", value, ttl)
+
+    async def _call_shared(self, default: Any, method: Callable, *args) -> Any:
+        """Call the shared backend off the event loop, returning default if it does not answer in time."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, method, *args), self.timeout)
+        except asyncio.TimeoutError:
+            metrics.inc("stonks_shared_cache_total", kind="charts", result="timeout")
+            return default
+
+    async def _adopt_shared(self, key: Hashable) -> None:
+        """Copy a chart from the shared cache if it outlives the local copy."""
+        entry = await self._call_shared(None, self.shared.get, f"chart:{key!r}")
+        if entry is None:
+            return
+        value, ttl = entry
+        local = self._entries.get(key)
+        if local is None or local[0] < time.monotonic() + ttl:
+            self.put(key, value, ttl)
+
+    def _remove(self, key: Hashable) -> None:
+        """Drop an entry and release its bytes from the budget."""
+        _, value = self._entries.pop(key)
+        self.size -= len(value)
+
+    def clear(self) -> None:
+        """Drop all cached charts."""
+        self._entries.clear()
+        self.size = 0
@@ -0,0 +1,28 @@
+"""
+Chart data types for Stonks Bot.
+
+Holds the prepared, render-ready chart data and the figure constants the
+data pipeline needs to size it. Kept free of matplotlib so fetching and
+preparing data (and the bot's startup) never pay for the plotting
+library; only render.py and the render workers import it.
+"""
+
+from typing import List, NamedTuple, Tuple
+import numpy as np
+
+FIGURE_SIZE = (15, 6)
+TICKS_NUM = 11
+
+
+class ChartData(NamedTuple):
+    """Normalized series and axis data needed to draw one chart."""
+    days: int
+    tickers: List[str]
+    prices: np.ndarray  # tickers x time, NaN outside each series' range
+    normalized: np.ndarray  # prices scaled by each series' maximum
+    timestamps: np.ndarray  # shared time grid in epoch milliseconds
+    x_ticks: np.ndarray
+    x_labels: np.ndarray
+    x_limits: Tuple[float, float]
+    y_min: float
+    interval: str  # finest bar interval among the series, which sets how long the chart stays fresh
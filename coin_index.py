@@ -0,0 +1,133 @@
+"""
+CoinGecko coin id resolution for Stonks Bot.
+
+Builds a symbol index from CoinGecko's coin list so tickers like "PEPE"
+resolve to CoinGecko ids ("pepe") without guessing. The list is persisted
+locally as JSON and refreshed after a TTL. Many coins share a symbol, so
+candidates are ranked: curated mappings from config first, then market
+cap rank, then the shortest id (bridged and wrapped copies have longer
+ids). Unknown tickers can be rejected, with suggestions, before any price
+request is made.
+"""
+
+import bisect
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rank given to coins outside the market cap ranking
+UNRANKED = 1_000_000
+
+
+class CoinIndex:
+    """Exact and prefix lookup of CoinGecko ids by symbol, id or name."""
+
+    def __init__(self, path: Optional[str], ttl: float, pinned: Dict[str, str]):
+        self.path = path
+        self.ttl = ttl
+        self.pinned = {symbol.upper(): coin_id for symbol, coin_id in pinned.items()}
+        self.fetched_at = 0.0
+        self._symbols: List[str] = []
+        self._symbol_ids: List[str] = []
+        self._ids: set = set()
+        self._names: Dict[str, str] = {}
+
+    @property
+    def loaded(self) -> bool:
+        """Whether a coin list has been loaded."""
+        return bool(self._ids)
+
+    def is_stale(self) -> bool:
+        """Whether the coin list is missing or older than the TTL."""
+        return time.time() - self.fetched_at > self.ttl
+
+    def load(self) -> bool:
+        """Load the persisted coin list, returning False if there is none."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            self._build(stored["coins"], stored["fetched_at"])
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not load coin index from {self.path}: {e}")
+            return False
+
+    def update(self, coins: List[dict], market_ranks: Dict[str, int]) -> None:
+        """Rebuild the index from a /coins/list response and persist it."""
+        rows = [
+            (coin["id"], coin["symbol"], coin.get("name") or "", market_ranks.get(coin["id"], UNRANKED))
+            for coin in coins
+            if coin.get("id") and coin.get("symbol")
+        ]
+        self._build(rows, time.time())
+        self._save(rows)
+
+    def resolve(self, ticker: str) -> Optional[str]:
+        """Get the best CoinGecko id for a ticker, or None if it is unknown."""
+        symbol = ticker.upper()
+        if symbol in self.pinned:
+            return self.pinned[symbol]
+
+        if not self.loaded:
+            # Without a coin list, fall back to using the ticker as an id
+            return ticker.lower()
+
+        position = bisect.bisect_left(self._symbols, symbol)
+        if position < len(self._symbols) and self._symbols[position] == symbol:
+            return self._symbol_ids[position]
+
+        lowered = ticker.lower()
+        if lowered in self._ids:
+            return lowered
+        return self._names.get(lowered)
+
+    def suggest(self, ticker: str, limit: int = 3) -> List[str]:
+        """Get known symbols starting with the ticker."""
+        prefix = ticker.upper()
+        position = bisect.bisect_left(self._symbols, prefix)
+        suggestions = []
+        while (position < len(self._symbols) and self._symbols[position].startswith(prefix)
+               and len(suggestions) < limit):
+            suggestions.append(self._symbols[position])
+            position += 1
+        return suggestions
+
+    def _build(self, rows: Iterable[Tuple[str, str, str, int]], fetched_at: float) -> None:
+        """Build the sorted symbol index and the id and name lookups."""
+        # Sort by symbol, then rank, so the first entry per symbol is the best candidate
+        ranked = sorted(
+            (symbol.upper(), rank, len(coin_id), coin_id, name)
+            for coin_id, symbol, name, rank in rows
+        )
+
+        # Keep only the best candidate per symbol
+        self._symbols = []
+        self._symbol_ids = []
+        for symbol, _, _, coin_id, _ in ranked:
+            if not self._symbols or self._symbols[-1] != symbol:
+                self._symbols.append(symbol)
+                self._symbol_ids.append(coin_id)
+
+        self._names = {}
+        for _, _, _, coin_id, name in sorted(ranked, key=lambda row: row[1:3]):
+            self._names.setdefault(name.lower(), coin_id)
+
+        self._ids = {coin_id for _, _, _, coin_id, _ in ranked}
+        self.fetched_at = fetched_at
+
+    def _save(self, rows: List[Tuple[str, str, str, int]]) -> None:
+        """Persist the coin list."""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump({"fetched_at": self.fetched_at, "coins": rows}, f, separators=(",", ":"))
+        except OSError as e:
+            logger.warning(f"Could not save coin index to {self.path}: {e}")
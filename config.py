@@ -20,7 +20,16 @@ BOT_CONFIG = {
     "log_level": "INFO",
     "chart_dpi": 300,
     "chart_format": "png",
-    "chart_bbox_inches": "tight"
+    "chart_bbox_inches": "tight",
+    "chart_profile": "auto",  # an OUTPUT_PROFILES name, or "auto" for the fastest encode + upload
+    "upload_bytes_per_second": 1_000_000  # assumed upload speed until uploads have been measured
+}
+
+# Output Profiles: how charts are encoded, from fastest to best quality
+OUTPUT_PROFILES = {
+    "preview": {"format": "png", "dpi": 100, "colors": 64},  # palette-quantized PNG
+    "compact": {"format": "webp", "dpi": 150, "quality": 85},
+    "full": {"format": BOT_CONFIG["chart_format"], "dpi": BOT_CONFIG["chart_dpi"]}
 }
 
 # Default Tickers Configuration
@@ -35,16 +44,56 @@ API_CONFIG = {
     "polygon": {
         "base_url": "https://api.polygon.io/v2/aggs",
         "api_key_env": "POLYGON",
-        "rate_limit_delay": 60,  # seconds
-        "max_retries": 3
+        "rate_limit_delay": 60,  # seconds, longest wait before a retry
+        "max_retries": 3,
+        "backoff_base": 1,  # seconds, first retry delay before jitter
+        "requests_per_minute": 5,  # free tier
+        "burst": 5,
+        "max_concurrency": 4  # parallel requests per provider
     },
     "coingecko": {
         "base_url": "https://api.coingecko.com/api/v3",
-        "rate_limit_delay": 30,  # seconds
-        "max_retries": 3
+        "rate_limit_delay": 30,  # seconds, longest wait before a retry
+        "max_retries": 3,
+        "backoff_base": 1,  # seconds, first retry delay before jitter
+        "requests_per_minute": 30,  # demo tier
+        "burst": 10,
+        "max_concurrency": 4  # parallel requests per provider
     }
 }
 
+# Data Sources: providers tried for a ticker, by ticker prefix (longest match), most preferred first
+SOURCE_CONFIG = {
+    "routes": {
+        "X:": ["polygon", "coingecko"],  # Polygon tickers; X:<COIN>USD pairs can also come from CoinGecko
+        "": ["coingecko"]  # coin symbols
+    },
+    "hedge_delay": 2.0,  # seconds to wait before asking the next source, until latencies are measured
+    "hedge_percentile": 95,  # otherwise wait for this percentile of the source's recent latencies
+    "hedge_delay_min": 0.25,  # seconds, bounds for the measured hedge delay
+    "hedge_delay_max": 5.0,
+    "latency_samples": 100,  # recent latencies kept per source
+    "failure_threshold": 3,  # consecutive failures before a source is tried last
+    "cooldown_seconds": 60  # how long a failing source is tried last
+}
+
+# HTTP Client Configuration
+HTTP_CONFIG = {
+    "connect_timeout": 5,  # seconds
+    "read_timeout": 30,  # seconds
+    "num_pools": 10,  # hosts kept alive at once
+    "pool_maxsize": None,  # connections per host; None = largest provider max_concurrency
+    "http2": os.getenv("HTTP2", "").lower() in ("1", "true", "yes")  # needs the h2 package
+}
+
+# Metrics Configuration
+METRICS_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes"),
+    "host": os.getenv("METRICS_HOST", "127.0.0.1"),
+    "port": int(os.getenv("METRICS_PORT", "9100")),
+    "profile_dir": os.getenv("METRICS_PROFILE_DIR") or None  # write one JSON profile per command
+}
+
 # Chart Configuration
 CHART_CONFIG = {
     "figure_size": (15, 6),
@@ -60,7 +109,62 @@ CHART_CONFIG = {
     "y_axis_margin": 0.05
 }
 
-# Ticker Mappings for CoinGecko
+# Render Worker Configuration
+RENDER_CONFIG = {
+    "workers": int(os.getenv("RENDER_WORKERS", "0")) or None,  # None = usable CPU cores, up to default_workers_max
+    # Each worker holds its own matplotlib (~80 MB), and containers often report the host's cores
+    "default_workers_max": 2,
+    "max_queue": 16  # renders allowed to wait for a worker before new ones are rejected
+}
+
+# Command Scheduler Configuration
+SCHEDULER_CONFIG = {
+    "max_running": 4,  # commands processed at once
+    "max_queue": 32,  # commands allowed to wait before new ones are rejected
+    "per_user": 1,  # commands running at once for one user
+    "per_guild": 2,  # commands running at once for one guild
+    "per_user_queued": 2  # commands one user may have waiting
+}
+
+# Hot Chart Warmer Configuration
+WARMER_CONFIG = {
+    "enabled": True,
+    "top_n": 5,  # most requested charts kept rendered
+    "check_interval": 15,  # seconds between checks for charts about to expire
+    "refresh_margin": 20,  # re-render a hot chart this many seconds before it expires
+    "retry_seconds": 60,  # wait before warming a chart again after it failed
+    "decay_seconds": 3600  # halve request counts this often so popularity follows recent traffic
+}
+
+# Price History Cache Configuration
+CACHE_CONFIG = {
+    "price_store_path": os.getenv("PRICE_STORE_PATH", "cache/prices.sqlite3"),  # empty disables
+    "min_refresh_seconds": 60,  # serve cached prices without a top-up fetch for this long
+    "series_buffer_max": 64,  # price series kept in memory per provider (widest window each)
+    "chart_cache_max_bytes": 64 * 1024 * 1024,  # memory budget for rendered charts
+    # A chart stays fresh for one bar of the finest interval it was drawn from, within these bounds (seconds)
+    "chart_ttl_min": 60,
+    "chart_ttl_max": 600,
+    "coin_index_path": "cache/coingecko_coins.json",  # persisted CoinGecko coin list, empty disables
+    "coin_index_ttl": 24 * 60 * 60,  # seconds before the coin list is fetched again
+    "coin_index_retry_seconds": 300  # wait after a failed coin list fetch before trying again
+}
+
+# Sharding Configuration (run one process per shard range to use more cores or instances)
+SHARD_CONFIG = {
+    "shard_count": int(os.getenv("SHARD_COUNT", "0")) or None,  # total shards; None = Discord's recommendation
+    "shard_ids": os.getenv("SHARD_IDS", "")  # shards run by this process, e.g. "0-3" or "0,2"; empty = all
+}
+
+# Shared Cache Configuration (prices, rendered charts and rate limits shared by all processes)
+SHARED_CACHE_CONFIG = {
+    # sqlite:///path for processes on one host, redis://host:6379/0 across hosts; empty = process-local
+    "url": os.getenv("SHARED_CACHE_URL", ""),
+    "timeout": 0.5,  # seconds before a shared cache call gives up
+    "price_ttl": 600  # seconds fetched price windows stay shared (stale ones are topped up)
+}
+
+# Ticker Mappings for CoinGecko (preferred over the coin list when symbols collide)
 COINGECKO_TICKER_MAPPING = {
     "BTC": "bitcoin",
     "ETH": "ethereum",
@@ -88,7 +192,12 @@ ERROR_MESSAGES = {
     "rate_limit": "Rate limit exceeded. Please wait before making another request.",
     "network_error": "Network error occurred. Please check your internet connection.",
     "invalid_days": "Invalid number of days. Please use a positive integer.",
-    "too_many_tickers": "Too many tickers specified. Maximum allowed is 10."
+    "too_many_tickers": "Too many tickers specified. Maximum allowed is 10.",
+    "render_busy": "Too many charts are being generated right now. Please try again shortly.",
+    "queue_full": "The chart queue is full right now. Please try again in a minute.",
+    "user_busy": "You already have charts waiting. Please wait for them to finish.",
+    "unknown_profile": "Unknown output profile. Use --preview, --compact or --full.",
+    "unknown_coin": "Unknown CoinGecko ticker."
 }
 
 # Validation Rules
@@ -103,7 +212,8 @@ VALIDATION_RULES = {
 PATHS = {
     "images_directory": "pics",
     "logs_directory": "logs",
-    "config_directory": "config"
+    "config_directory": "config",
+    "cache_directory": "cache"
 }
 
 # Environment Variables
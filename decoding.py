@@ -0,0 +1,107 @@
+"""
+Columnar decoding of provider responses for Stonks Bot.
+
+Provider responses are decoded straight from the raw body into typed
+NumPy columns, without building a Python dict or list per data point.
+If a body does not have the expected shape, decoding falls back to a
+regular JSON parse (using orjson when it is installed).
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Flat "c": and "t": fields inside Polygon aggregate objects
+_POLYGON_CLOSE = re.compile(rb'"c":\s*(-?[0-9][0-9.eE+-]*)')
+_POLYGON_TIME = re.compile(rb'"t":\s*(-?[0-9]+)')
+
+# Characters stripped from a CoinGecko [[ts, price], ...] array before parsing
+_ARRAY_NOISE = b"[] \t\r\n"
+
+
+def loads(body: bytes) -> Any:
+    """Parse a JSON body with the fastest available backend."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_polygon_bars(body: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode a Polygon aggregates body into (timestamps, closes) columns."""
+    section = _array_section(body, b'"results":')
+    if section is not None:
+        closes = _POLYGON_CLOSE.findall(section)
+        times = _POLYGON_TIME.findall(section)
+        objects = section.count(b"{")
+        if len(closes) == len(times) == objects:
+            return _parse_numbers(times).astype(np.int64), _parse_numbers(closes)
+
+    # Unexpected layout, or no results at all
+    results = loads(body).get("results") or []
+    return (
+        np.fromiter((result["t"] for result in results), dtype=np.int64, count=len(results)),
+        np.fromiter((result["c"] for result in results), dtype=np.float64, count=len(results))
+    )
+
+
+def decode_coingecko_prices(body: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode a CoinGecko market_chart body into (timestamps, prices) columns."""
+    section = _array_section(body, b'"prices":')
+    if section is not None:
+        text = section.translate(None, _ARRAY_NOISE)
+        if not text:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        try:
+            values = np.fromstring(text, dtype=np.float64, sep=",")
+        except ValueError:
+            # Newer NumPy raises on non-numeric entries; older ones stop early
+            values = None
+
+        if values is not None and values.size == text.count(b",") + 1 and values.size % 2 == 0:
+            pairs = values.reshape(-1, 2)
+            return pairs[:, 0].astype(np.int64), np.ascontiguousarray(pairs[:, 1])
+
+    # Unexpected layout (e.g. null prices), or no prices at all
+    points = [point for point in loads(body).get("prices") or [] if point[1] is not None]
+    return (
+        np.fromiter((point[0] for point in points), dtype=np.int64, count=len(points)),
+        np.fromiter((point[1] for point in points), dtype=np.float64, count=len(points))
+    )
+
+
+def _parse_numbers(tokens: List[bytes]) -> np.ndarray:
+    """Parse numeric tokens into a float64 array in one pass."""
+    if not tokens:
+        return np.empty(0, dtype=np.float64)
+    return np.fromstring(b",".join(tokens), dtype=np.float64, sep=",")
+
+
+def _array_section(body: bytes, key: bytes) -> Optional[bytes]:
+    """
+    Slice the array value of a top-level key out of a JSON body.
+
+    Only works for arrays of flat objects or of flat arrays, which is
+    what the provider responses contain; returns None otherwise.
+    """
+    start = body.find(key)
+    if start < 0:
+        return None
+
+    start = body.find(b"[", start + len(key))
+    if start < 0:
+        return None
+
+    # Flat objects end at the first ']', nested [ts, price] pairs at the first ']]'
+    depth_end = b"]]" if body[start + 1:].lstrip()[:1] == b"[" else b"]"
+    end = body.find(depth_end, start)
+    if end < 0:
+        return None
+
+    return body[start:end + len(depth_end)]
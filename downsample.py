@@ -0,0 +1,25 @@
+"""
+Downsampling of price series before plotting.
+
+Works out how many points a figure can actually show. The series are then
+reduced to that budget with min/max-per-bucket decimation when they are
+aligned (see alignment.py): each pixel-wide bucket keeps its lowest and
+highest point, so the drawn line keeps every visible extreme while the
+number of vertices stays proportional to the figure width.
+"""
+
+# Formats whose resolution is fixed at 72 points per inch regardless of dpi
+VECTOR_FORMATS = {"svg", "svgz", "pdf", "eps", "ps"}
+
+# HTML canvases are drawn at CSS pixels, 96 per inch
+HTML_DPI = 96
+
+
+def target_points(figure_width: float, dpi: int, format: str = "png") -> int:
+    """Get the number of points worth drawing across a figure."""
+    if format in VECTOR_FORMATS:
+        dpi = 72
+    elif format == "html":
+        dpi = HTML_DPI
+    # Two points (min and max) per horizontal pixel
+    return int(figure_width * dpi) * 2
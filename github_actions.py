@@ -3,10 +3,123 @@ GitHub Actions script for updating stonks images.
 
 This script is used by the GitHub Actions workflow to automatically
 update the stonks images with the latest market data.
+
+Usage:
+    python github_actions.py [days] [tickers...]    # one chart
+    python github_actions.py --manifest charts.json  # every chart in a manifest
+
+In manifest mode each distinct ticker is fetched once per bar interval,
+at the widest window any job needs, and the providers serve narrower
+windows (or coarser bars rolled up from finer ones) from that data in
+memory. All charts are then rendered in parallel in one process.
 """
 
-from stonks import main
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from chart_data import FIGURE_SIZE
+from downsample import target_points
+from http_client import get_http_client
+from stonks import DEFAULT_TICKERS, ChartRenderer, StonksChart, available_cpus, get_chart_instance, main
+
+CHART_DPI = 300
+
+
+def load_manifest(path: str) -> List[dict]:
+    """Load chart jobs (days, tickers, format, output) from a JSON manifest."""
+    with open(path) as f:
+        jobs = json.load(f)
+
+    for job in jobs:
+        job["days"] = int(job["days"])
+        job.setdefault("tickers", DEFAULT_TICKERS)
+        job.setdefault("format", "svg")
+
+    return jobs
+
+
+async def fetch_widest(chart: StonksChart, jobs: List[dict]) -> int:
+    """Fetch each distinct (ticker, interval) once, at the widest window needed."""
+    # (days, max points) of the widest job per series
+    widest: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    for job in jobs:
+        points = target_points(FIGURE_SIZE[0], CHART_DPI, job["format"])
+        for ticker in job["tickers"]:
+            interval = chart._get_data_provider(ticker).get_interval(job["days"], points)
+            key = (ticker, interval)
+            widest[key] = max(widest.get(key, (0, 0)), (job["days"], points))
+
+    # Failures are reported by the jobs that need the series
+    await asyncio.gather(
+        *(
+            chart.fetch_prices(ticker, days, points)
+            for (ticker, _), (days, points) in widest.items()
+        ),
+        return_exceptions=True
+    )
+    return len(widest)
+
+
+async def render_job(chart: StonksChart, renderer: ChartRenderer, job: dict) -> None:
+    """Build one chart from the fetched windows, render it and write it to disk."""
+    start = time.perf_counter()
+
+    data = await chart.get_chart_data(
+        job["days"], job["tickers"], target_points(FIGURE_SIZE[0], CHART_DPI, job["format"])
+    )
+    prepared = time.perf_counter()
+
+    image = await renderer.render(data, job["format"], CHART_DPI)
+    rendered = time.perf_counter()
+
+    directory = os.path.dirname(job["output"])
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(job["output"], "wb") as f:
+        f.write(image)
+
+    print(
+        f"{job['output']}: prepare {(prepared - start) * 1000:.0f} ms, "
+        f"render {(rendered - prepared) * 1000:.0f} ms, {len(image) / 1024:.0f} KB"
+    )
+
+
+async def run_batch(jobs: List[dict]) -> int:
+    """Run every job in a manifest and return the number of failed jobs."""
+    chart = get_chart_instance()
+    batch_start = time.perf_counter()
+
+    fetched = await fetch_widest(chart, jobs)
+    print(f"Fetched {fetched} series in {time.perf_counter() - batch_start:.2f}s")
+
+    renderer = ChartRenderer(workers=min(len(jobs), available_cpus()), max_queue=len(jobs))
+    try:
+        outcomes = await asyncio.gather(
+            *(render_job(chart, renderer, job) for job in jobs),
+            return_exceptions=True
+        )
+    finally:
+        renderer.shutdown()
+
+    failures = 0
+    for job, outcome in zip(jobs, outcomes):
+        if isinstance(outcome, BaseException):
+            failures += 1
+            print(f"Error generating {job['output']}: {outcome}")
+
+    print(f"Generated {len(jobs) - failures}/{len(jobs)} charts in {time.perf_counter() - batch_start:.2f}s")
+    print(get_http_client().format_stats())
+    return failures
+
 
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--manifest":
+        failed = asyncio.run(run_batch(load_manifest(sys.argv[2])))
+        sys.exit(1 if failed else 0)
+
     # Save images for GitHub Actions (using SVG format)
     main(save=True, format='svg')
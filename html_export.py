@@ -0,0 +1,186 @@
+"""
+Self-contained HTML export for Stonks Bot charts.
+
+Writes a single HTML page that draws the chart on a canvas with a few
+lines of inline JavaScript, instead of shipping a rendered image. The page
+embeds only the downsampled, normalized series (as integers, at a
+resolution finer than a screen can show) plus one scale per ticker to
+recover prices, so it stays small, loads without any external scripts
+and resizes with the window. Hovering shows the date and every ticker's
+price at that point.
+"""
+
+import html
+import json
+from typing import List
+import numpy as np
+
+from chart_data import ChartData
+
+# Normalized prices and x positions (both about 0..1) are embedded as integer multiples of 1 / UNIT
+UNIT = 10_000
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>%(title)s</title>
+<style>
+body { margin: 0; background: #000; color: #fff; font: 13px sans-serif; }
+canvas { display: block; width: 100%%; aspect-ratio: 5 / 2; }
+</style>
+</head>
+<body>
+<canvas id="chart"></canvas>
+<script>
+const chart = %(chart)s;
+const fromUnits = (values) => values.map((value) => value === null ? null : value / chart.unit);
+chart.x = fromUnits(chart.x);
+chart.ticks = fromUnits(chart.ticks);
+chart.series = chart.series.map(fromUnits);
+const canvas = document.getElementById("chart");
+const ctx = canvas.getContext("2d");
+const pad = { left: 50, right: 110, top: 30, bottom: 90 };
+let hover = null;
+
+function draw() {
+  const ratio = window.devicePixelRatio || 1;
+  const width = canvas.clientWidth, height = canvas.clientHeight;
+  canvas.width = width * ratio;
+  canvas.height = height * ratio;
+  ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+  ctx.clearRect(0, 0, width, height);
+  const plotWidth = width - pad.left - pad.right, plotHeight = height - pad.top - pad.bottom;
+  const yMin = chart.yMin - 0.05, yMax = 1.05;
+  const px = (x) => pad.left + x * plotWidth;
+  const py = (y) => pad.top + (yMax - y) / (yMax - yMin) * plotHeight;
+
+  ctx.fillStyle = "#fff";
+  ctx.textAlign = "center";
+  ctx.fillText(chart.title, width / 2, pad.top - 12);
+
+  // Grid with percentage and date labels
+  ctx.strokeStyle = "#595959";
+  ctx.setLineDash([6, 4]);
+  ctx.textAlign = "right";
+  for (let percent = 0; percent <= 100; percent += 10) {
+    const y = py(percent / 100);
+    if (y < pad.top || y > pad.top + plotHeight) continue;
+    ctx.beginPath(); ctx.moveTo(pad.left, y); ctx.lineTo(pad.left + plotWidth, y); ctx.stroke();
+    ctx.fillText(percent, pad.left - 6, y + 4);
+  }
+  chart.ticks.forEach((tick, i) => {
+    const x = px(tick);
+    ctx.beginPath(); ctx.moveTo(x, pad.top); ctx.lineTo(x, pad.top + plotHeight); ctx.stroke();
+    ctx.save();
+    ctx.translate(x, pad.top + plotHeight + 8);
+    ctx.rotate(-Math.PI / 4);
+    ctx.fillText(chart.labels[i], 0, 0);
+    ctx.restore();
+  });
+  ctx.setLineDash([]);
+
+  // One line per ticker, broken where a series has no data
+  ctx.save();
+  ctx.beginPath(); ctx.rect(pad.left, pad.top, plotWidth, plotHeight); ctx.clip();
+  ctx.lineWidth = 2;
+  chart.series.forEach((values, row) => {
+    ctx.strokeStyle = chart.colors[row];
+    ctx.beginPath();
+    let drawing = false;
+    values.forEach((value, i) => {
+      if (value === null) { drawing = false; return; }
+      if (drawing) ctx.lineTo(px(chart.x[i]), py(value));
+      else ctx.moveTo(px(chart.x[i]), py(value));
+      drawing = true;
+    });
+    ctx.stroke();
+  });
+  ctx.restore();
+
+  // Legend
+  ctx.textAlign = "left";
+  chart.tickers.forEach((ticker, row) => {
+    const y = pad.top + 10 + row * 18;
+    ctx.fillStyle = chart.colors[row];
+    ctx.fillRect(pad.left + plotWidth + 12, y - 4, 18, 3);
+    ctx.fillStyle = "#fff";
+    ctx.fillText(ticker, pad.left + plotWidth + 36, y);
+  });
+
+  if (hover !== null) {
+    const x = px(chart.x[hover]);
+    ctx.strokeStyle = "#aaa";
+    ctx.beginPath(); ctx.moveTo(x, pad.top); ctx.lineTo(x, pad.top + plotHeight); ctx.stroke();
+    const time = chart.start + chart.x[hover] * (chart.end - chart.start);
+    // Positions are rounded, so long charts only show the day
+    const long = chart.end - chart.start > 7 * 86400000;
+    const lines = [new Date(time).toISOString().slice(0, long ? 10 : 16).replace("T", " ") + (long ? "" : " UTC")];
+    chart.tickers.forEach((ticker, row) => {
+      const value = chart.series[row][hover];
+      if (value !== null) lines.push(ticker + ": " + (value * chart.scales[row]).toFixed(2));
+    });
+    const left = x + 160 > width ? x - 160 : x + 8;
+    ctx.fillStyle = "rgba(0, 0, 0, 0.75)";
+    ctx.fillRect(left, pad.top, 152, lines.length * 16 + 8);
+    ctx.fillStyle = "#fff";
+    lines.forEach((line, i) => ctx.fillText(line, left + 6, pad.top + 16 + i * 16));
+  }
+}
+
+canvas.addEventListener("mousemove", (event) => {
+  const rect = canvas.getBoundingClientRect();
+  const x = (event.clientX - rect.left - pad.left) / (rect.width - pad.left - pad.right);
+  let best = 0;
+  for (let i = 1; i < chart.x.length; i++) {
+    if (Math.abs(chart.x[i] - x) < Math.abs(chart.x[best] - x)) best = i;
+  }
+  hover = x >= 0 && x <= 1 ? best : null;
+  draw();
+});
+canvas.addEventListener("mouseleave", () => { hover = null; draw(); });
+window.addEventListener("resize", draw);
+draw();
+</script>
+</body>
+</html>
+"""
+
+
+def render_html(data: ChartData, colors: List[str]) -> bytes:
+    """Build a self-contained HTML page that draws the chart on a canvas."""
+    start, end = (float(limit) for limit in data.x_limits)
+    span = (end - start) or 1.0
+    title = f"{('Last day' if data.days == 1 else f'{data.days} days')} asset price comparison"
+
+    # Prices are the normalized values times each series' maximum; a row with no data has no scale
+    scales = []
+    for prices, normalized in zip(data.prices, data.normalized):
+        covered = ~np.isnan(normalized)
+        scales.append(float(prices[covered].max() / normalized[covered].max()) if covered.any() else None)
+
+    chart = {
+        "title": title,
+        "tickers": list(data.tickers),
+        "colors": [colors[i % len(colors)] for i in range(len(data.tickers))],
+        "start": start,
+        "end": end,
+        "x": _to_units((data.timestamps - start) / span),
+        "series": [_to_units(row) for row in data.normalized],
+        "scales": scales,
+        "ticks": _to_units((data.x_ticks - start) / span),
+        "labels": [str(label) for label in data.x_labels],
+        "yMin": float(data.y_min),
+        "unit": UNIT
+    }
+
+    # Escape "<" so no value can close the script element
+    payload = json.dumps(chart, separators=(",", ":")).replace("<", "\\u003c")
+    return (PAGE % {"title": html.escape(title), "chart": payload}).encode()
+
+
+def _to_units(values: np.ndarray) -> List:
+    """Convert values to integer units for embedding, with gaps (NaN) as null."""
+    scaled = np.round(values.astype(float) * UNIT)
+    return [None if value != value else int(value) for value in scaled.tolist()]
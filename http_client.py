@@ -0,0 +1,142 @@
+"""
+Shared HTTP client for Stonks Bot data providers.
+
+All providers share one urllib3 PoolManager with per-host pools sized to
+the fetch concurrency, connect/read timeouts and keep-alive reuse. The
+pools record how often connections are reused, how long requests wait
+for a free connection and how long new connections (TCP + TLS) take.
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+import urllib3
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import API_CONFIG, HTTP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolStatsMixin:
+    """Connection pool that times connection checkout and connection setup."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_time = 0.0
+        self.connect_time = 0.0
+
+    def _get_conn(self, timeout: Optional[float] = None):
+        start = time.perf_counter()
+        try:
+            return super()._get_conn(timeout)
+        finally:
+            self.wait_time += time.perf_counter() - start
+
+    def _validate_conn(self, conn) -> None:
+        # Connect eagerly so the TCP and TLS handshake can be timed on its own
+        if conn.is_closed:
+            start = time.perf_counter()
+            conn.connect()
+            self.connect_time += time.perf_counter() - start
+        super()._validate_conn(conn)
+
+
+class _StatsHTTPConnectionPool(_PoolStatsMixin, HTTPConnectionPool):
+    pass
+
+
+class _StatsHTTPSConnectionPool(_PoolStatsMixin, HTTPSConnectionPool):
+    pass
+
+
+class HttpClient:
+    """Pooled, keep-alive HTTP client shared by all data providers."""
+
+    def __init__(self, maxsize: int, connect_timeout: float, read_timeout: float,
+                 num_pools: int = 10, http2: bool = False):
+        if http2:
+            _enable_http2()
+
+        self.pool = urllib3.PoolManager(
+            num_pools=num_pools,
+            maxsize=maxsize,
+            # Wait for a free keep-alive connection instead of opening throwaway ones
+            block=True,
+            timeout=urllib3.Timeout(connect=connect_timeout, read=read_timeout),
+            # Retries are handled by the providers
+            retries=False
+        )
+        self.pool.pool_classes_by_scheme = {
+            "http": _StatsHTTPConnectionPool,
+            "https": _StatsHTTPSConnectionPool
+        }
+
+    def request(self, method: str, url: str, **kwargs) -> urllib3.BaseHTTPResponse:
+        """Send a request through the shared pools."""
+        return self.pool.request(method, url, **kwargs)
+
+    def stats(self) -> Dict[str, dict]:
+        """Get per-host pool statistics."""
+        stats = {}
+        for key in self.pool.pools.keys():
+            pool = self.pool.pools[key]
+            requests = pool.num_requests
+            connections = pool.num_connections
+            stats[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "requests": requests,
+                "connections": connections,
+                "reuse_rate": 1 - connections / requests if requests else 0.0,
+                "wait_seconds": pool.wait_time,
+                "connect_seconds": pool.connect_time
+            }
+        return stats
+
+    def gauges(self) -> Dict[tuple, float]:
+        """Get pool statistics as metric gauges keyed by (name, labels)."""
+        gauges = {}
+        for host, host_stats in self.stats().items():
+            labels = (("host", host),)
+            for stat, value in host_stats.items():
+                gauges[(f"stonks_http_pool_{stat}", labels)] = value
+        return gauges
+
+    def format_stats(self) -> str:
+        """Describe the pool statistics in one line per host."""
+        return "\n".join(
+            f"{host}: {s['requests']} requests, {s['connections']} connections "
+            f"({s['reuse_rate']:.0%} reused), waited {s['wait_seconds']:.2f}s, "
+            f"connecting took {s['connect_seconds']:.2f}s"
+            for host, s in self.stats().items()
+        )
+
+
+def _enable_http2() -> None:
+    """Switch urllib3 to HTTP/2 where the optional h2 package is available."""
+    try:
+        import urllib3.http2
+        urllib3.http2.inject_into_urllib3()
+    except ImportError:
+        logger.warning("HTTP/2 requested but not available (needs urllib3>=2.3 and h2); using HTTP/1.1")
+
+
+# Global client instance
+_client_instance = None
+
+
+def get_http_client() -> HttpClient:
+    """Get or create the shared HTTP client."""
+    global _client_instance
+    if _client_instance is None:
+        # One connection per concurrent fetch against the busiest host
+        maxsize = HTTP_CONFIG["pool_maxsize"] or max(
+            provider.get("max_concurrency", 1) for provider in API_CONFIG.values()
+        )
+        _client_instance = HttpClient(
+            maxsize=maxsize,
+            connect_timeout=HTTP_CONFIG["connect_timeout"],
+            read_timeout=HTTP_CONFIG["read_timeout"],
+            num_pools=HTTP_CONFIG["num_pools"],
+            http2=HTTP_CONFIG["http2"]
+        )
+    return _client_instance
@@ -0,0 +1,241 @@
+"""
+Latency tracing and Prometheus-style metrics for Stonks Bot.
+
+Pipeline stages (network, decode, normalize, plot, encode, upload, ...)
+are recorded as spans into per-stage histograms, alongside counters for
+cache hits, rate limiting and dropped tickers. Metrics are served as
+Prometheus text on a local /metrics endpoint, and each command can
+optionally be written out as a JSON profile.
+
+When metrics are disabled every call returns immediately and span()
+hands back a shared no-op context manager.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_METRIC = "stonks_stage_seconds"
+
+_NULL_SPAN = contextlib.nullcontext()
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestProfile:
+    """Spans and counters collected while handling one command."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.spans: List[dict] = []
+        self.counters: Dict[str, float] = {}
+
+    def add_span(self, stage: str, seconds: float, labels: Dict[str, str]) -> None:
+        """Record a finished span relative to the start of the request."""
+        self.spans.append({
+            "stage": stage,
+            "end": round(time.perf_counter() - self._start, 6),
+            "seconds": round(seconds, 6),
+            **labels
+        })
+
+    def to_dict(self) -> dict:
+        """Get the profile as a JSON-serializable dict."""
+        return {
+            "command": self.name,
+            "started": self.started,
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+            "spans": self.spans,
+            "counters": self.counters
+        }
+
+
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("stonks_profile", default=None)
+
+
+class Metrics:
+    """Registry of counters and histograms."""
+
+    def __init__(self, enabled: bool = False, profile_dir: Optional[str] = None):
+        self.enabled = enabled
+        self.profile_dir = profile_dir
+        self._counters: Dict[LabelKey, float] = {}
+        self._histograms: Dict[LabelKey, Histogram] = {}
+        self._collectors: List[Callable[[], Dict[LabelKey, float]]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Increment a counter."""
+        if not self.enabled:
+            return
+
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+        profile = _current_profile.get()
+        if profile is not None:
+            counter = _format_key(key)
+            profile.counters[counter] = profile.counters.get(counter, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Add an observation to a histogram."""
+        if not self.enabled:
+            return
+
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def record(self, stage: str, seconds: float, **labels: str) -> None:
+        """Record a stage duration measured elsewhere (e.g. in a worker process)."""
+        if not self.enabled:
+            return
+
+        self.observe(STAGE_METRIC, seconds, stage=stage, **labels)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.add_span(stage, seconds, labels)
+
+    def span(self, stage: str, **labels: str):
+        """Time a block of code as one pipeline stage."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(stage, labels)
+
+    @contextlib.contextmanager
+    def _span(self, stage: str, labels: Dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, **labels)
+
+    @contextlib.contextmanager
+    def request_profile(self, name: str) -> Iterator[Optional[RequestProfile]]:
+        """Collect the spans of one command and write them out as JSON if configured."""
+        if not self.enabled:
+            yield None
+            return
+
+        profile = RequestProfile(name)
+        token = _current_profile.set(profile)
+        try:
+            yield profile
+        finally:
+            _current_profile.reset(token)
+            self.observe("stonks_command_seconds", time.perf_counter() - profile._start)
+            if self.profile_dir:
+                self._write_profile(profile)
+
+    def add_collector(self, collector: Callable[[], Dict[LabelKey, float]]) -> None:
+        """Register a callback that supplies gauge values at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h.counts), h.total, h.count) for key, h in self._histograms.items()}
+
+        for key, value in sorted(counters.items()):
+            lines.append(f"{_format_key(key)} {value}")
+
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            for bound, bucket_count in zip(BUCKETS, counts):
+                lines.append(f"{_format_key((name + '_bucket', labels + (('le', str(bound)),)))} {bucket_count}")
+            lines.append(f"{_format_key((name + '_bucket', labels + (('le', '+Inf'),)))} {count}")
+            lines.append(f"{_format_key((name + '_sum', labels))} {total}")
+            lines.append(f"{_format_key((name + '_count', labels))} {count}")
+
+        for collector in self._collectors:
+            for key, value in sorted(collector().items()):
+                lines.append(f"{_format_key(key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def start_server(self, host: str, port: int) -> ThreadingHTTPServer:
+        """Serve /metrics from a background thread."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+    def _write_profile(self, profile: RequestProfile) -> None:
+        """Write one request profile to the profile directory."""
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            filename = f"{int(profile.started * 1000)}-{uuid.uuid4().hex[:8]}.json"
+            with open(os.path.join(self.profile_dir, filename), "w") as f:
+                json.dump(profile.to_dict(), f, indent=2)
+        except OSError as e:
+            logger.error(f"Could not write request profile: {e}")
+
+
+def _key(name: str, labels: Dict[str, str]) -> LabelKey:
+    """Build a hashable metric key from a name and labels."""
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_key(key: LabelKey) -> str:
+    """Format a metric key as name{label="value",...}."""
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+# Global metrics registry
+metrics = Metrics(enabled=METRICS_CONFIG["enabled"], profile_dir=METRICS_CONFIG["profile_dir"])
@@ -0,0 +1,72 @@
+"""
+Price series type for Stonks Bot.
+
+A PriceSeries is what providers hand to the chart pipeline: one ticker's
+prices as contiguous int64 timestamps (epoch milliseconds) and float64
+prices, plus where they came from. Windows served from a provider's
+buffer are passed in as views, so building a series copies nothing.
+Statistics the pipeline needs (maximum, minimum, normalized prices) are
+computed on first use and kept. Dates are a datetime64 view of the
+timestamps; labels are only formatted for the ticks that are drawn.
+"""
+
+from typing import Optional
+import numpy as np
+
+
+class PriceSeries:
+    """One ticker's prices with its provider, bar interval and cached statistics."""
+
+    __slots__ = ("timestamps", "prices", "ticker", "provider", "interval", "_max", "_min", "_normalized")
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray, ticker: str,
+                 provider: str, interval: str):
+        # Copies only if the arrays are not already contiguous int64 / float64
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        self.prices = np.ascontiguousarray(prices, dtype=np.float64)
+        self.ticker = ticker
+        self.provider = provider
+        self.interval = interval
+        self._max: Optional[float] = None
+        self._min: Optional[float] = None
+        self._normalized: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __repr__(self) -> str:
+        return f"PriceSeries({self.ticker!r}, {self.provider}, {self.interval}, {len(self)} points)"
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Zero-copy datetime64[ms] view of the timestamps."""
+        return self.timestamps.view("datetime64[ms]")
+
+    @property
+    def max(self) -> float:
+        """Highest price."""
+        if self._max is None:
+            self._max = float(self.prices.max())
+        return self._max
+
+    @property
+    def min(self) -> float:
+        """Lowest price."""
+        if self._min is None:
+            self._min = float(self.prices.min())
+        return self._min
+
+    @property
+    def normalized(self) -> np.ndarray:
+        """Read-only prices scaled by the highest price."""
+        if self._normalized is None:
+            normalized = self.prices / self.max
+            normalized.flags.writeable = False
+            self._normalized = normalized
+        return self._normalized
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the series' arrays, including cached ones."""
+        cached = self._normalized.nbytes if self._normalized is not None else 0
+        return self.timestamps.nbytes + self.prices.nbytes + cached
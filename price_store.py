@@ -0,0 +1,126 @@
+"""
+Persistent price history store for Stonks Bot.
+
+Fetched series are kept in a local SQLite database keyed by
+(provider, ticker, interval), together with the time range they cover,
+so repeat requests only need to download the missing tail.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Optional, Tuple
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    provider TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (provider, ticker, interval, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    provider TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    PRIMARY KEY (provider, ticker, interval)
+);
+"""
+
+
+class PriceStore:
+    """SQLite-backed time-series store for fetched prices."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Providers fetch from worker threads, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get_coverage(self, provider: str, ticker: str, interval: str) -> Optional[Tuple[int, int]]:
+        """Return the (start_ms, end_ms) range stored for a series, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_ms, end_ms FROM coverage WHERE provider = ? AND ticker = ? AND interval = ?",
+                (provider, ticker, interval)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def get_last_timestamp(self, provider: str, ticker: str, interval: str) -> Optional[int]:
+        """Return the newest stored timestamp for a series, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(ts) FROM prices WHERE provider = ? AND ticker = ? AND interval = ?",
+                (provider, ticker, interval)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, provider: str, ticker: str, interval: str,
+             start_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Load (timestamps, prices) stored at or after start_ms."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, price FROM prices WHERE provider = ? AND ticker = ? AND interval = ? "
+                "AND ts >= ? ORDER BY ts",
+                (provider, ticker, interval, start_ms)
+            ).fetchall()
+
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        timestamps, prices = zip(*rows)
+        return np.array(timestamps, dtype=np.int64), np.array(prices, dtype=np.float64)
+
+    def save(self, provider: str, ticker: str, interval: str,
+             timestamps: np.ndarray, prices: np.ndarray,
+             start_ms: int, end_ms: int, replace: bool = False) -> None:
+        """
+        Merge fetched points into the store.
+
+        Stored points at or after the first fetched timestamp are replaced,
+        since the newest bar of the previous fetch may have been incomplete.
+        With replace=True the whole series is rewritten.
+        """
+        key = (provider, ticker, interval)
+        rows = zip(
+            [provider] * len(timestamps), [ticker] * len(timestamps), [interval] * len(timestamps),
+            timestamps.tolist(), prices.tolist()
+        )
+
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute(
+                    "DELETE FROM prices WHERE provider = ? AND ticker = ? AND interval = ?", key
+                )
+            elif len(timestamps) > 0:
+                self._conn.execute(
+                    "DELETE FROM prices WHERE provider = ? AND ticker = ? AND interval = ? AND ts >= ?",
+                    key + (int(timestamps[0]),)
+                )
+
+            self._conn.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?)", rows)
+
+            # Extend the covered range, or reset it after a full rewrite
+            self._conn.execute(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (provider, ticker, interval) DO UPDATE SET "
+                "start_ms = CASE WHEN ? THEN excluded.start_ms ELSE MIN(start_ms, excluded.start_ms) END, "
+                "end_ms = MAX(end_ms, excluded.end_ms)",
+                key + (start_ms, end_ms, replace)
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,98 @@
+"""
+Output profile selection for Stonks Bot.
+
+Charts can be encoded with several profiles (see config.OUTPUT_PROFILES),
+from a fast low-dpi preview to the full-quality image. Every render
+records its profile's encode time and size, every upload the achieved
+upload speed, and the "auto" profile picks whichever profile is expected
+to finish encode plus upload first. Profiles without measurements yet
+are tried first, cheapest first.
+"""
+
+import threading
+from typing import Dict, Optional
+
+from config import BOT_CONFIG, OUTPUT_PROFILES
+
+# Weight of the newest sample in the moving averages
+SMOOTHING = 0.2
+
+
+class ProfileStats:
+    """Moving averages of encode time and size per profile, and of upload speed."""
+
+    def __init__(self, upload_bytes_per_second: float):
+        self.upload_bytes_per_second = upload_bytes_per_second
+        self.encode_seconds: Dict[str, float] = {}
+        self.sizes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record_encode(self, profile: str, seconds: float, size: int) -> None:
+        """Record one encode with a profile."""
+        with self._lock:
+            self.encode_seconds[profile] = _smooth(self.encode_seconds.get(profile), seconds)
+            self.sizes[profile] = _smooth(self.sizes.get(profile), size)
+
+    def record_upload(self, size: int, seconds: float) -> None:
+        """Record one upload of an encoded chart."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.upload_bytes_per_second = _smooth(self.upload_bytes_per_second, size / seconds)
+
+    def estimate(self, profile: str) -> Optional[float]:
+        """Get the expected encode plus upload seconds for a profile, if it was measured."""
+        if profile not in self.encode_seconds:
+            return None
+        return self.encode_seconds[profile] + self.sizes[profile] / self.upload_bytes_per_second
+
+    def fastest(self) -> str:
+        """Get the profile expected to be delivered soonest."""
+        estimates = {}
+        for profile in OUTPUT_PROFILES:
+            estimate = self.estimate(profile)
+            if estimate is None:
+                return profile
+            estimates[profile] = estimate
+        return min(estimates, key=estimates.get)
+
+    def format_stats(self) -> str:
+        """Describe the measured profiles in one line each."""
+        lines = []
+        for profile, options in OUTPUT_PROFILES.items():
+            if profile not in self.encode_seconds:
+                continue
+            lines.append(
+                f"{profile} ({options['format']}, {options['dpi']} dpi): "
+                f"encode {self.encode_seconds[profile] * 1000:.0f}ms, "
+                f"{self.sizes[profile] / 1024:.0f} KB, "
+                f"expected delivery {self.estimate(profile):.2f}s"
+            )
+        return "\n".join(lines)
+
+
+def _smooth(average: Optional[float], value: float) -> float:
+    """Fold a new sample into an exponential moving average."""
+    if average is None:
+        return value
+    return average + SMOOTHING * (value - average)
+
+
+def choose_profile(requested: Optional[str] = None) -> str:
+    """Resolve a requested profile name, or the configured default, to a concrete profile."""
+    profile = requested or BOT_CONFIG["chart_profile"]
+    if profile == "auto":
+        return get_profile_stats().fastest()
+    return profile
+
+
+# Global profile statistics
+_stats_instance = None
+
+
+def get_profile_stats() -> ProfileStats:
+    """Get or create the global profile statistics."""
+    global _stats_instance
+    if _stats_instance is None:
+        _stats_instance = ProfileStats(BOT_CONFIG["upload_bytes_per_second"])
+    return _stats_instance
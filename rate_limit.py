@@ -0,0 +1,127 @@
+"""
+Client-side rate limiting and retry backoff for Stonks Bot.
+
+Each provider gets a token bucket matched to its API tier, so bursts of
+requests queue up locally instead of being rejected upstream with 429.
+When several bot processes share one API key, the limit is kept in the
+shared cache instead (SharedTokenBucket), so scaling out does not
+multiply the request rate.
+"""
+
+import email.utils
+import random
+import threading
+import time
+from typing import Optional
+
+from shared_cache import SharedCache
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        # Tokens accrue from this moment on; pause() moves it into the future
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns the time waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            # Reserve the token now (possibly going negative) so waiters are served in order
+            self._tokens -= 1
+            wait = max(0.0, self._updated - now)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back new requests for a while, e.g. after an upstream 429."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 1)
+            self._updated = max(self._updated, now + seconds)
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+
+class SharedTokenBucket:
+    """Rate limit shared through the shared cache: capacity requests per capacity/rate seconds."""
+
+    def __init__(self, cache: SharedCache, name: str, rate: float, capacity: float):
+        self.cache = cache
+        self.name = name
+        self.capacity = capacity
+        self.window = capacity / rate
+        # Used while the shared cache is unreachable
+        self._local = TokenBucket(rate, capacity)
+
+    def acquire(self) -> float:
+        """Take one request from the shared window, sleeping until one is available. Returns the time waited."""
+        waited = 0.0
+        while True:
+            paused = self.cache.get(f"ratelimit:{self.name}:paused")
+            if paused is not None:
+                time.sleep(paused[1])
+                waited += paused[1]
+                continue
+
+            now = time.time()
+            window = int(now // self.window)
+            try:
+                count = self.cache.incr(f"ratelimit:{self.name}:{window}", self.window * 2)
+            except OSError:
+                return waited + self._local.acquire()
+            if count <= self.capacity:
+                return waited
+
+            # This window is used up by some process; try again in the next one
+            delay = (window + 1) * self.window - now
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold back new requests from every process for a while, e.g. after an upstream 429."""
+        self.cache.set(f"ratelimit:{self.name}:paused", b"1", seconds)
+        self._local.pause(seconds)
+
+
+def backoff_delay(attempt: int, base: float, cap: float,
+                  retry_after: Optional[float] = None) -> float:
+    """Get the delay before a retry: Retry-After if given, else jittered exponential."""
+    if retry_after is not None:
+        return min(retry_after, cap)
+
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,277 @@
+"""
+Chart rendering for Stonks Bot.
+
+This module turns prepared chart data into matplotlib figures and encoded
+image bytes. It only uses the object-oriented Figure/Agg API (no global
+pyplot state, except show_chart() for command-line use), so it is safe to
+run inside worker processes. Importing it loads matplotlib, so the bot
+process leaves that to the render workers.
+
+Encoded renders reuse pooled figure templates: the axes, grid, styling and
+label artists are built once per figure, each render only swaps line data,
+ticks and label text, and tight_layout() only runs again when the tickers
+or title change.
+
+SVG output is kept compact for charts committed to the repository: text
+stays text (referencing fonts instead of embedding glyph outlines), path
+coordinates are cut to a hundredth of a point and the output carries no
+timestamp, so identical charts produce identical files. "svgz" is the
+same SVG gzipped, and "html" is a self-contained canvas page (see
+html_export.py) drawn without matplotlib.
+"""
+
+import gzip
+import io
+import re
+import threading
+import time
+from typing import Hashable, List, Optional, Tuple
+import numpy as np
+import matplotlib
+import matplotlib.patheffects as pe
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from PIL import Image
+
+from chart_data import FIGURE_SIZE, TICKS_NUM, ChartData
+from html_export import render_html
+
+CHART_STYLE = "dark_background"
+TEMPLATE_POOL_SIZE = 2
+
+# Vector formats whose text is written as <text> elements
+SVG_FORMATS = {"svg", "svgz"}
+SVG_RC = {
+    "svg.fonttype": "none",
+    "svg.hashsalt": "stonks",
+    # Written into every <text> element's style
+    "font.sans-serif": ["DejaVu Sans", "Arial", "Helvetica"]
+}
+
+# Price labels are outlined for contrast on images; outlines would turn SVG text into glyph paths
+LABEL_OUTLINE = [pe.withStroke(linewidth=2, foreground="black")]
+LABEL_BACKDROP = {"boxstyle": "square,pad=0.1", "facecolor": "black", "alpha": 0.6, "linewidth": 0}
+
+# Path data numbers in SVG output, truncated to two decimals
+_SVG_PATH_DATA = re.compile(rb' d="[^"]*"')
+_SVG_LONG_DECIMALS = re.compile(rb"(\.\d\d)\d+")
+
+
+class FigureTemplate:
+    """Chart figure whose static parts are built once and reused across renders."""
+
+    def __init__(self, fig: Optional[Figure] = None):
+        if fig is None:
+            fig = Figure(figsize=FIGURE_SIZE)
+            FigureCanvasAgg(fig)
+        self.fig = fig
+        self.ax = ax = fig.add_subplot()
+        self.colors = matplotlib.rcParams["axes.prop_cycle"].by_key()["color"]
+        self.layout_key: Optional[Hashable] = None
+
+        # All tickers share the time grid, so they are drawn as one collection
+        self.lines = LineCollection([], linewidths=3)
+        ax.add_collection(self.lines)
+
+        # Price labels for the first ticker
+        self.price_labels = [
+            ax.text(
+                0, 0, "",
+                color="white", size=8, rotation=90,
+                path_effects=LABEL_OUTLINE
+            )
+            for _ in range(TICKS_NUM)
+        ]
+
+        # Y-axis configuration
+        price_ticks = np.linspace(0, 1, 11)
+        ax.set_yticks(price_ticks)
+        ax.set_yticklabels((price_ticks * 100).astype(int))
+
+        # Grid and labels
+        ax.grid(linewidth=2, color="#595959", linestyle="--")
+        ax.set_xlabel("Time")
+        ax.set_ylabel("Normalized Price (%)")
+
+    def update(self, data: ChartData) -> None:
+        """Draw new chart data, redoing the layout only if it changed."""
+        ax = self.ax
+        colors = [self.colors[i % len(self.colors)] for i in range(len(data.tickers))]
+
+        x = np.broadcast_to(data.timestamps.astype(float), data.normalized.shape)
+        self.lines.set_segments(np.stack((x, data.normalized), axis=-1))
+        self.lines.set_color(colors)
+
+        self._update_price_labels(data.timestamps, data.normalized[0], data.prices[0])
+
+        # X-axis configuration
+        ax.set_xticks(data.x_ticks)
+        ax.set_xticklabels(data.x_labels, rotation=45, ha="right")
+
+        # Chart limits
+        ax.set_ylim(data.y_min - 0.05, 1.05)
+        ax.set_xlim(*data.x_limits)
+
+        days = data.days
+        title = f"{('Last day' if days == 1 else f'{days} days')} asset price comparison"
+
+        # Tick labels always have the same width, so only the legend and title move the layout
+        layout_key = (tuple(data.tickers), title)
+        if layout_key != self.layout_key:
+            handles = [Line2D([], [], color=color, linewidth=3) for color in colors]
+            ax.legend(handles, data.tickers, bbox_to_anchor=(1.02, 1), loc="upper left")
+            ax.set_title(title)
+            # Lay out from the default margins so the result matches a fresh figure
+            self.fig.subplots_adjust(**{
+                side: matplotlib.rcParams[f"figure.subplot.{side}"]
+                for side in ("left", "right", "bottom", "top")
+            })
+            self.fig.tight_layout()
+            self.layout_key = layout_key
+
+    def set_label_outlines(self, outlined: bool) -> None:
+        """Draw price labels with a stroked outline, or on a plain backdrop (for SVG text)."""
+        for label in self.price_labels:
+            label.set_path_effects(LABEL_OUTLINE if outlined else [])
+            label.set_bbox(None if outlined else LABEL_BACKDROP)
+
+    def _update_price_labels(self, timestamps: np.ndarray, normalized: np.ndarray,
+                             prices: np.ndarray) -> None:
+        """Move the price labels onto the first ticker's line."""
+        # Spread the labels over the part of the grid the series covers
+        covered = np.flatnonzero(~np.isnan(normalized))
+        if covered.shape[0] == 0:
+            for label in self.price_labels:
+                label.set_text("")
+            return
+        ticks_positions = covered[np.int32(np.linspace(0, covered.shape[0] - 1, TICKS_NUM))]
+
+        for label, x, y, price in zip(
+            self.price_labels,
+            timestamps[ticks_positions],
+            normalized[ticks_positions],
+            prices[ticks_positions]
+        ):
+            label.set_position((x, y))
+            label.set_text(f"{price:.2f}")
+
+
+# Figure templates ready for reuse by render_chart_timed
+_template_pool: List[FigureTemplate] = []
+_template_lock = threading.Lock()
+
+
+def _acquire_template() -> FigureTemplate:
+    """Take a figure template from the pool, building one if none are free."""
+    with _template_lock:
+        if _template_pool:
+            return _template_pool.pop()
+    return FigureTemplate()
+
+
+def _release_template(template: FigureTemplate) -> None:
+    """Return a figure template to the pool."""
+    with _template_lock:
+        if len(_template_pool) < TEMPLATE_POOL_SIZE:
+            _template_pool.append(template)
+
+
+def init_worker() -> None:
+    """Warm up a render worker process with a figure template before its first job."""
+    # Workers never open windows; make the headless backend explicit
+    matplotlib.use("Agg")
+    with matplotlib.style.context(CHART_STYLE):
+        _release_template(FigureTemplate())
+
+
+def build_figure(data: ChartData) -> Figure:
+    """Build a standalone Agg figure for the given chart data."""
+    with matplotlib.style.context(CHART_STYLE):
+        template = FigureTemplate()
+        template.update(data)
+    return template.fig
+
+
+def render_chart(data: ChartData, format: str = "png", dpi: int = 300,
+                 colors: Optional[int] = None, quality: Optional[int] = None) -> bytes:
+    """Render chart data and return the encoded image bytes."""
+    return render_chart_timed(data, format, dpi, colors, quality)[0]
+
+
+def render_chart_timed(data: ChartData, format: str = "png", dpi: int = 300,
+                       colors: Optional[int] = None,
+                       quality: Optional[int] = None) -> Tuple[bytes, float, float]:
+    """Render chart data, returning (image bytes, plot seconds, encode seconds)."""
+    with matplotlib.style.context(CHART_STYLE):
+        start = time.perf_counter()
+        if format == "html":
+            page = render_html(data, matplotlib.rcParams["axes.prop_cycle"].by_key()["color"])
+            return page, 0.0, time.perf_counter() - start
+
+        template = _acquire_template()
+        template.update(data)
+        template.set_label_outlines(format not in SVG_FORMATS)
+        plotted = time.perf_counter()
+
+        image = encode_figure(template.fig, format, dpi, colors, quality)
+
+    # A template that failed mid-render is dropped rather than reused
+    _release_template(template)
+    return image, plotted - start, time.perf_counter() - plotted
+
+
+def encode_figure(fig: Figure, format: str = "png", dpi: int = 300,
+                  colors: Optional[int] = None, quality: Optional[int] = None) -> bytes:
+    """Encode a figure, optionally palette-quantizing PNGs or setting a lossy quality."""
+    if format in SVG_FORMATS:
+        return encode_svg(fig, compress=format == "svgz")
+
+    buf = io.BytesIO()
+
+    if format == "png" and colors:
+        # Rasterize without compression, then compress the much smaller palette image
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight", pil_kwargs={"compress_level": 0})
+        buf.seek(0)
+        image = Image.open(buf).convert("RGB").quantize(colors, method=Image.Quantize.FASTOCTREE)
+        buf = io.BytesIO()
+        image.save(buf, format="png")
+    elif quality is not None:
+        fig.savefig(buf, format=format, dpi=dpi, bbox_inches="tight", pil_kwargs={"quality": quality})
+    else:
+        fig.savefig(buf, format=format, dpi=dpi, bbox_inches="tight")
+
+    return buf.getvalue()
+
+
+def encode_svg(fig: Figure, compress: bool = False) -> bytes:
+    """Encode a figure as compact SVG, gzipped if compress is set."""
+    buf = io.BytesIO()
+    with matplotlib.rc_context(SVG_RC):
+        fig.savefig(buf, format="svg", bbox_inches="tight", metadata={"Date": None})
+
+    svg = _SVG_PATH_DATA.sub(lambda match: _SVG_LONG_DECIMALS.sub(rb"\1", match.group()), buf.getvalue())
+    if compress:
+        # A fixed mtime keeps identical charts byte-identical
+        return gzip.compress(svg, mtime=0)
+    return svg
+
+
+def draw_chart(fig: Figure, data: ChartData) -> None:
+    """Draw the price comparison chart onto an empty figure."""
+    FigureTemplate(fig).update(data)
+
+
+def show_chart(data: ChartData) -> None:
+    """Draw chart data in an interactive pyplot window (command-line use only)."""
+    import matplotlib.pyplot as plt
+
+    with matplotlib.style.context(CHART_STYLE):
+        fig = plt.figure(figsize=FIGURE_SIZE)
+        draw_chart(fig, data)
+    try:
+        plt.show(block=True)
+    finally:
+        plt.close("all")
@@ -0,0 +1,55 @@
+"""
+Multi-resolution price rollups for Stonks Bot.
+
+Prices come in a ladder of bar sizes (1 minute, 15 minutes, 1 hour,
+1 day). A chart window is served from the coarsest bar size that still
+gives every pixel column at least one bar, so a year of prices costs
+about as many points to fetch, align and plot as a week. Coarser bars
+are rolled up from finer ones already held in memory where possible,
+rather than fetched again. Like the providers' own bars, a rolled-up bar
+is stamped with the start of its interval and closes at the last price
+inside it.
+
+Only closes are rolled up. Charts draw closing prices, and alignment
+already keeps the lowest and highest close in each pixel column, so bar
+highs and lows would never be drawn.
+"""
+
+from typing import Optional, Sequence, Tuple
+import numpy as np
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Bar sizes, finest first
+INTERVAL_MS = {
+    "minute": 60 * 1000,
+    "5minute": 5 * 60 * 1000,
+    "15minute": 15 * 60 * 1000,
+    "hour": 60 * 60 * 1000,
+    "day": DAY_MS
+}
+
+
+def choose_interval(intervals: Sequence[str], span: int, min_bars: Optional[int],
+                    max_bars: int) -> str:
+    """Pick the coarsest interval giving at least min_bars bars over a span, within max_bars."""
+    # Intervals are ordered finest first; the coarsest is used even if it is too fine
+    fitting = [interval for interval in intervals if span // INTERVAL_MS[interval] <= max_bars]
+    fitting = fitting or [intervals[-1]]
+
+    if min_bars:
+        for interval in reversed(fitting):
+            if span // INTERVAL_MS[interval] >= min_bars:
+                return interval
+    return fitting[0]
+
+
+def roll_up(timestamps: np.ndarray, prices: np.ndarray, step: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Roll (timestamps, closes) up into bars of step ms, stamped with their start."""
+    if len(timestamps) == 0:
+        return timestamps, prices
+
+    # Keep the last point of each bucket (timestamps are sorted)
+    buckets = timestamps - timestamps % step
+    last = np.append(buckets[1:] != buckets[:-1], True)
+    return buckets[last], prices[last]
@@ -0,0 +1,150 @@
+"""
+Command scheduler for the Stonks Discord bot.
+
+Sits between on_message and the chart pipeline. Commands wait in a
+bounded queue and are started in arrival order, skipping users and
+guilds that are already at their concurrency cap so one busy channel
+cannot starve the others. Identical commands share a single job and
+all of their waiters get the same result. When the queue is full new
+commands are rejected instead of piling up, which keeps tail latency
+bounded.
+"""
+
+import asyncio
+import contextvars
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config import SCHEDULER_CONFIG
+from metrics import metrics
+from stonks import ERROR_MESSAGES, StonksError
+
+
+class Job:
+    """One scheduled command and the future its waiters share."""
+
+    def __init__(self, key: Hashable, user: Hashable, guild: Optional[Hashable],
+                 factory: Callable[[], Awaitable[bytes]]):
+        self.key = key
+        self.user = user
+        self.guild = guild
+        self.factory = factory
+        self.future = asyncio.get_running_loop().create_future()
+        # Run in the submitter's context (e.g. its request profile), not the dispatcher's
+        self.context = contextvars.copy_context()
+
+
+class CommandScheduler:
+    """Bounded, fair work queue with per-user and per-guild concurrency caps."""
+
+    def __init__(self, max_running: int, max_queue: int, per_user: int,
+                 per_guild: int, per_user_queued: int):
+        self.max_running = max_running
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self.per_guild = per_guild
+        self.per_user_queued = per_user_queued
+        self._pending: List[Job] = []
+        self._jobs: Dict[Hashable, Job] = {}
+        self._running = 0
+        self._running_users: Counter = Counter()
+        self._running_guilds: Counter = Counter()
+
+    def submit(self, key: Hashable, user: Hashable, guild: Optional[Hashable],
+               factory: Callable[[], Awaitable[bytes]]) -> Tuple["asyncio.Future[bytes]", int]:
+        """Schedule a command; returns its result future and queue position (0 = started)."""
+        job = self._jobs.get(key)
+        if job is not None:
+            metrics.inc("stonks_scheduler_total", result="coalesced")
+            return job.future, self._position(job)
+
+        if len(self._pending) >= self.max_queue:
+            metrics.inc("stonks_scheduler_total", result="rejected")
+            raise StonksError(ERROR_MESSAGES["queue_full"])
+
+        if sum(1 for queued in self._pending if queued.user == user) >= self.per_user_queued:
+            metrics.inc("stonks_scheduler_total", result="rejected")
+            raise StonksError(ERROR_MESSAGES["user_busy"])
+
+        job = Job(key, user, guild, factory)
+        self._jobs[key] = job
+        self._pending.append(job)
+        metrics.inc("stonks_scheduler_total", result="queued")
+        self._dispatch()
+        return job.future, self._position(job)
+
+    def _position(self, job: Job) -> int:
+        """Get a job's 1-based place in the queue, or 0 once it has started."""
+        try:
+            return self._pending.index(job) + 1
+        except ValueError:
+            return 0
+
+    def _can_start(self, job: Job) -> bool:
+        """Check the per-user and per-guild caps for a queued job."""
+        if self._running_users[job.user] >= self.per_user:
+            return False
+        return job.guild is None or self._running_guilds[job.guild] < self.per_guild
+
+    def _dispatch(self) -> None:
+        """Start queued jobs in arrival order while there is capacity."""
+        for job in list(self._pending):
+            if self._running >= self.max_running:
+                break
+            if not self._can_start(job):
+                continue
+
+            self._pending.remove(job)
+            self._running += 1
+            self._running_users[job.user] += 1
+            if job.guild is not None:
+                self._running_guilds[job.guild] += 1
+
+            task = job.context.run(asyncio.ensure_future, job.factory())
+            task.add_done_callback(lambda done, job=job: self._finish(job, done))
+
+    def _finish(self, job: Job, task: asyncio.Task) -> None:
+        """Hand a finished job's result to its waiters and start the next jobs."""
+        self._jobs.pop(job.key, None)
+        self._running -= 1
+        self._running_users[job.user] -= 1
+        if self._running_users[job.user] <= 0:
+            del self._running_users[job.user]
+        if job.guild is not None:
+            self._running_guilds[job.guild] -= 1
+            if self._running_guilds[job.guild] <= 0:
+                del self._running_guilds[job.guild]
+
+        if task.cancelled():
+            job.future.cancel()
+        elif task.exception() is not None:
+            job.future.set_exception(task.exception())
+        else:
+            job.future.set_result(task.result())
+
+        self._dispatch()
+
+    def gauges(self) -> Dict[tuple, float]:
+        """Get queue depth and running jobs as metric gauges."""
+        return {
+            ("stonks_scheduler_queued", ()): len(self._pending),
+            ("stonks_scheduler_running", ()): self._running
+        }
+
+
+# Global scheduler instance
+_scheduler_instance = None
+
+
+def get_scheduler() -> CommandScheduler:
+    """Get or create the global command scheduler."""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = CommandScheduler(
+            max_running=SCHEDULER_CONFIG["max_running"],
+            max_queue=SCHEDULER_CONFIG["max_queue"],
+            per_user=SCHEDULER_CONFIG["per_user"],
+            per_guild=SCHEDULER_CONFIG["per_guild"],
+            per_user_queued=SCHEDULER_CONFIG["per_user_queued"]
+        )
+    return _scheduler_instance
@@ -0,0 +1,118 @@
+"""
+In-memory price windows for Stonks Bot providers.
+
+Each provider keeps, per (symbol, interval), the widest window it has
+fetched. A request for a narrower window of the same series is answered
+with NumPy views found by binary search on the timestamps, so asking for
+3, 14 and 365 days of one ticker costs one fetch per bar interval. When a
+window goes stale only its tail is fetched; the new points are appended
+and the oldest ones dropped, so the window keeps its span.
+
+Window arrays are never written to after they are created. A top-up
+builds new arrays instead, so views handed out earlier stay valid while
+a chart is still being prepared from them.
+"""
+
+import struct
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import numpy as np
+
+
+class SeriesWindow:
+    """Read-only (timestamps, prices) arrays covering start to end."""
+
+    __slots__ = ("timestamps", "prices", "start", "end")
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray, start: int, end: int):
+        timestamps.flags.writeable = False
+        prices.flags.writeable = False
+        self.timestamps = timestamps
+        self.prices = prices
+        self.start = start
+        self.end = end
+
+    # start, end and number of points, followed by the timestamps and prices
+    HEADER = struct.Struct("<qqq")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SeriesWindow":
+        """Rebuild a window serialized by to_bytes()."""
+        start, end, count = cls.HEADER.unpack_from(data)
+        timestamps = np.frombuffer(data, dtype=np.int64, count=count, offset=cls.HEADER.size)
+        prices = np.frombuffer(data, dtype=np.float64, count=count, offset=cls.HEADER.size + count * 8)
+        return cls(timestamps, prices, start, end)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the window, e.g. for the shared cache."""
+        return (
+            self.HEADER.pack(self.start, self.end, len(self.timestamps))
+            + self.timestamps.astype(np.int64, copy=False).tobytes()
+            + self.prices.astype(np.float64, copy=False).tobytes()
+        )
+
+    @property
+    def last_timestamp(self) -> int:
+        """Newest point in the window, or its end if it has none."""
+        return int(self.timestamps[-1]) if len(self.timestamps) else self.end
+
+    def view(self, start_time: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get zero-copy (timestamps, prices) views from start_time on."""
+        first = np.searchsorted(self.timestamps, start_time)
+        return self.timestamps[first:], self.prices[first:]
+
+
+class SeriesBuffer:
+    """Widest fetched window per series, bounded to a number of series (LRU)."""
+
+    def __init__(self, max_series: int):
+        self.max_series = max_series
+        self._windows: "OrderedDict[Hashable, SeriesWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, start_time: int) -> Optional[SeriesWindow]:
+        """Get the window for a series if it reaches back to start_time."""
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.start > start_time:
+                return None
+            self._windows.move_to_end(key)
+            return window
+
+    def put(self, key: Hashable, timestamps: np.ndarray, prices: np.ndarray,
+            start: int, end: int) -> SeriesWindow:
+        """Store a fetched window unless a wider, newer one is already held."""
+        window = SeriesWindow(timestamps, prices, start, end)
+        with self._lock:
+            current = self._windows.get(key)
+            if current is not None and current.start <= start and current.end >= end:
+                return current
+            self._windows[key] = window
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_series:
+                self._windows.popitem(last=False)
+        return window
+
+    def extend(self, key: Hashable, window: SeriesWindow, timestamps: np.ndarray,
+               prices: np.ndarray, end: int) -> SeriesWindow:
+        """Append a fetched tail to a window, dropping points that fall out of its span."""
+        start = window.start + (end - window.end)
+
+        # The tail replaces stored points from its first timestamp on (the last bar may have changed)
+        keep_from = np.searchsorted(window.timestamps, start)
+        keep_to = np.searchsorted(window.timestamps, timestamps[0]) if len(timestamps) else len(window.timestamps)
+        merged = SeriesWindow(
+            np.concatenate((window.timestamps[keep_from:keep_to], timestamps)),
+            np.concatenate((window.prices[keep_from:keep_to], prices)),
+            start, end
+        )
+
+        with self._lock:
+            # Another thread may have replaced the window meanwhile; keep the newer one
+            current = self._windows.get(key)
+            if current is window:
+                self._windows[key] = merged
+                self._windows.move_to_end(key)
+        return merged
+
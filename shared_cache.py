@@ -0,0 +1,329 @@
+"""
+Shared cache and coordination backend for Stonks Bot shards.
+
+When the bot runs as several processes (one per shard range, possibly on
+several machines), each would otherwise fetch the same prices, render the
+same charts and spend its own API rate limit. Processes share them
+through a small key-value backend instead:
+
+    sqlite:///cache/shared.sqlite3   a local file, shared by processes on one host
+    redis://host:6379/0              any Redis-compatible server, shared by every instance
+
+Sharing is off unless SHARED_CACHE_URL is set; a single process keeps
+everything in memory and uses its own token buckets.
+
+Both backends offer the same few operations: get/set with a TTL, an
+add-if-absent used to claim work, and an atomic counter used for shared
+rate limits. The Redis client speaks RESP directly, so no client library
+is needed. Backend failures are logged and treated as cache misses: a
+shard that loses the backend keeps working on its own.
+"""
+
+import logging
+import os
+import select
+import socket
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import SHARED_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps of expired SQLite entries
+PRUNE_INTERVAL = 60
+
+
+class RedisError(OSError):
+    """An error reply from the Redis server."""
+
+
+class SharedCache:
+    """Key-value store with TTLs shared by all bot processes. Implemented by backends."""
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Get a value and its remaining seconds to live, or None if it is missing."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store a value for ttl seconds."""
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store a value only if the key is missing; returns whether it was stored."""
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl: float) -> int:
+        """Increment a counter that expires ttl seconds after it was created; raises OSError on failure."""
+        raise NotImplementedError
+
+
+class SQLiteCache(SharedCache):
+    """Shared cache in a local SQLite file, for processes on the same host."""
+
+    def __init__(self, path: str, timeout: float):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pruned_at = 0.0
+        # Autocommit; each operation is one statement or an explicit transaction
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Get a value and its remaining seconds to live, or None if it is missing."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache get failed: {e}")
+            return None
+        return (bytes(row[0]), row[1] - time.time()) if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store a value for ttl seconds."""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, value, time.time() + ttl)
+                )
+                if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+                    self._prune()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache set failed: {e}")
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store a value only if the key is missing; returns whether it was stored."""
+        now = time.time()
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "INSERT INTO entries VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                    "WHERE entries.expires_at <= ?",
+                    (key, value, now + ttl, now)
+                )
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            # Without the backend every process does its own work
+            logger.warning(f"Shared cache add failed: {e}")
+            return True
+
+    def incr(self, key: str, ttl: float) -> int:
+        """Increment a counter that expires ttl seconds after it was created; returns the new value."""
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "INSERT INTO entries VALUES (?, 1, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET "
+                    "value = CASE WHEN expires_at > ? THEN value + 1 ELSE 1 END, "
+                    "expires_at = CASE WHEN expires_at > ? THEN expires_at ELSE excluded.expires_at END "
+                    "RETURNING value",
+                    (key, now + ttl, now, now)
+                ).fetchone()
+        except sqlite3.Error as e:
+            raise OSError(f"Shared cache incr failed: {e}") from e
+        return int(row[0])
+
+    def _prune(self) -> None:
+        """Delete expired entries."""
+        self._pruned_at = time.monotonic()
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+
+class RedisCache(SharedCache):
+    """Shared cache on a Redis-compatible server, spoken to over RESP."""
+
+    def __init__(self, host: str, port: int, db: int, password: Optional[str], timeout: float):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Get a value and its remaining seconds to live, or None if it is missing."""
+        try:
+            value, pttl = self._call([b"GET", key], [b"PTTL", key])
+        except OSError as e:
+            logger.warning(f"Shared cache get failed: {e}")
+            return None
+        if value is None:
+            return None
+        return value, pttl / 1000 if pttl > 0 else 0.0
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store a value for ttl seconds."""
+        try:
+            self._call([b"SET", key, value, b"PX", _milliseconds(ttl)])
+        except OSError as e:
+            logger.warning(f"Shared cache set failed: {e}")
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store a value only if the key is missing; returns whether it was stored."""
+        try:
+            reply, = self._call([b"SET", key, value, b"PX", _milliseconds(ttl), b"NX"])
+        except OSError as e:
+            # Without the backend every process does its own work
+            logger.warning(f"Shared cache add failed: {e}")
+            return True
+        return reply is not None
+
+    def incr(self, key: str, ttl: float) -> int:
+        """Increment a counter that expires ttl seconds after it was created; returns the new value."""
+        # Create the counter with its expiry first; INCR keeps an existing TTL
+        _, value = self._call([b"SET", key, b"0", b"PX", _milliseconds(ttl), b"NX"], [b"INCR", key])
+        return value
+
+    def _call(self, *commands: List) -> List:
+        """Send pipelined commands and read their replies; raises OSError on failure or an error reply."""
+        payload = b"".join(_encode(command) for command in commands)
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is not None and self._is_stale():
+                        self._close()
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    break
+                except OSError as e:
+                    # Nothing was sent in full, so the commands can be sent again on a new connection
+                    self._close()
+                    if attempt:
+                        raise OSError(f"Redis {self.host}:{self.port}: {e}") from e
+
+            try:
+                replies = [self._read_reply() for _ in commands]
+            except OSError as e:
+                # The server may already have applied the commands (an INCR would count twice), so never resend
+                self._close()
+                raise OSError(f"Redis {self.host}:{self.port}: {e}") from e
+
+        # Every reply was read, so the connection stays in step for the next call
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise RedisError(f"Redis {self.host}:{self.port}: {reply}")
+        return replies
+
+    def _is_stale(self) -> bool:
+        """Whether the idle connection was closed by the server (or has unread data)."""
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _connect(self) -> None:
+        """Open the connection and select the database."""
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+
+        setup = []
+        if self.password:
+            setup.append([b"AUTH", self.password])
+        if self.db:
+            setup.append([b"SELECT", str(self.db)])
+        if setup:
+            self._sock.sendall(b"".join(_encode(command) for command in setup))
+            for _ in setup:
+                self._read_reply()
+
+    def _close(self) -> None:
+        """Drop the connection; the next call reconnects."""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _read_reply(self):
+        """Read one RESP reply."""
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed")
+        kind, body = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            return RedisError(body.decode(errors="replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("connection closed")
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"unexpected reply {line[:20]!r}")
+
+
+def _encode(command: List) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def _milliseconds(seconds: float) -> str:
+    """Format a TTL in whole milliseconds (at least one)."""
+    return str(max(1, int(seconds * 1000)))
+
+
+def open_shared_cache(url: str, timeout: float) -> Optional[SharedCache]:
+    """Open the backend named by a sqlite:/// or redis:// URL; empty disables sharing."""
+    if not url:
+        return None
+
+    parsed = urlparse(url)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.strip("/") or 0)
+        return RedisCache(parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password, timeout)
+    if parsed.scheme == "sqlite":
+        # sqlite:///relative/path or sqlite:////absolute/path
+        return SQLiteCache(url[len("sqlite:///"):], timeout)
+    if not parsed.scheme:
+        return SQLiteCache(url, timeout)
+    raise ValueError(f"Unsupported shared cache URL: {url}")
+
+
+# Global shared cache, opened on first use
+_shared_cache_instance = None
+_shared_cache_opened = False
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Get the configured shared cache, or None if sharing is disabled."""
+    global _shared_cache_instance, _shared_cache_opened
+    if not _shared_cache_opened:
+        _shared_cache_opened = True
+        _shared_cache_instance = open_shared_cache(SHARED_CACHE_CONFIG["url"], SHARED_CACHE_CONFIG["timeout"])
+    return _shared_cache_instance
@@ -0,0 +1,128 @@
+"""
+Data source health and latency tracking for Stonks Bot.
+
+A ticker can often be served by more than one provider (see
+config.SOURCE_CONFIG). Every fetch records its source's latency and
+whether it succeeded, and those numbers steer routing:
+- Sources that serve a ticker as given (native sources) come before
+  sources that need it translated (X:BTCUSD asked as BTC), so latency
+  never overrides a route's order across that line.
+- Healthy native sources are tried fastest first, once they all have
+  been measured; until then they are tried in configured order.
+- A source that keeps failing is benched for a while and only tried after
+  the healthy ones.
+- The next source is asked (a hedged request) once the current one has
+  taken longer than its usual worst-case latency, so a slow upstream adds
+  at most that much to a chart.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Collection, Deque, Dict, Iterable, List, Optional
+
+from config import SOURCE_CONFIG
+
+# Weight of the newest sample in the latency moving average
+SMOOTHING = 0.2
+# Latency samples needed before a source's own percentile sets its hedge delay
+MIN_SAMPLES = 5
+
+
+class SourceStats:
+    """Latency and failure counts of one source."""
+
+    def __init__(self, samples: int):
+        self.latency: Optional[float] = None
+        self.recent: Deque[float] = deque(maxlen=samples)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.benched_until = 0.0
+
+    def is_benched(self) -> bool:
+        """Whether the source failed repeatedly and is cooling down."""
+        return time.monotonic() < self.benched_until
+
+
+class SourceHealth:
+    """Health and latency statistics for every source, used to order and hedge fetches."""
+
+    def __init__(self, config: dict = SOURCE_CONFIG):
+        self.config = config
+        self._stats: Dict[str, SourceStats] = {}
+        self._lock = threading.Lock()
+
+    def record_success(self, source: str, seconds: float) -> None:
+        """Record a fetch a source answered."""
+        with self._lock:
+            stats = self._get(source)
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.benched_until = 0.0
+            stats.recent.append(seconds)
+            stats.latency = seconds if stats.latency is None else stats.latency + SMOOTHING * (seconds - stats.latency)
+
+    def record_failure(self, source: str) -> None:
+        """Record a fetch a source failed, benching it after repeated failures."""
+        with self._lock:
+            stats = self._get(source)
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.config["failure_threshold"]:
+                stats.benched_until = time.monotonic() + self.config["cooldown_seconds"]
+
+    def rank(self, sources: Iterable[str], native: Optional[Collection[str]] = None) -> List[str]:
+        """Order sources (given most preferred first) by health, then native first, then expected latency."""
+        with self._lock:
+            stats = {source: self._get(source) for source in sources}
+        native = set(stats if native is None else native)
+        # Only native sources are compared by latency, and only once all of them are measured
+        measured = all(stats[source].latency is not None for source in native if source in stats)
+        # Sorting is stable, so without latencies to compare the configured order is kept
+        return sorted(stats, key=lambda source: (
+            stats[source].is_benched(),
+            source not in native,
+            stats[source].latency if measured and source in native else 0.0
+        ))
+
+    def hedge_delay(self, source: str) -> float:
+        """Get how long to wait for a source before also asking the next one."""
+        with self._lock:
+            recent = sorted(self._get(source).recent)
+        if len(recent) < MIN_SAMPLES:
+            return self.config["hedge_delay"]
+
+        position = min(len(recent) - 1, int(len(recent) * self.config["hedge_percentile"] / 100))
+        return min(max(recent[position], self.config["hedge_delay_min"]), self.config["hedge_delay_max"])
+
+    def gauges(self) -> Dict[tuple, float]:
+        """Get each source's latency and health as metric gauges."""
+        with self._lock:
+            stats = dict(self._stats)
+        values = {}
+        for source, source_stats in stats.items():
+            labels = (("source", source),)
+            values[("stonks_source_healthy", labels)] = 0 if source_stats.is_benched() else 1
+            if source_stats.latency is not None:
+                values[("stonks_source_latency_seconds", labels)] = round(source_stats.latency, 4)
+        return values
+
+    def format_stats(self) -> str:
+        """Describe every source in one line each."""
+        with self._lock:
+            stats = dict(self._stats)
+        lines = []
+        for source, source_stats in stats.items():
+            latency = f"{source_stats.latency * 1000:.0f}ms" if source_stats.latency is not None else "unmeasured"
+            lines.append(
+                f"{source}: {latency}, {source_stats.successes} ok, {source_stats.failures} failed"
+                f"{', benched' if source_stats.is_benched() else ''}"
+            )
+        return "\n".join(lines)
+
+    def _get(self, source: str) -> SourceStats:
+        """Get the statistics of a source, creating them on first use."""
+        if source not in self._stats:
+            self._stats[source] = SourceStats(self.config["latency_samples"])
+        return self._stats[source]
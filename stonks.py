@@ -6,29 +6,53 @@ This module provides functionality to fetch historical price data from multiple
 """
 
 import asyncio
-import datetime
-import json
+import contextvars
+import multiprocessing
 import os
 import sys
-import urllib3
-from typing import List, Tuple, Optional, Union
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple, Type, Optional, Union
 from urllib3.exceptions import HTTPError, RequestError, TimeoutError
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patheffects as pe
 import time
-from dotenv import load_dotenv
+from chart_cache import ChartCache
+from chart_data import FIGURE_SIZE, TICKS_NUM, ChartData
+from coin_index import CoinIndex
+from config import (
+    CACHE_CONFIG, COINGECKO_TICKER_MAPPING, OUTPUT_PROFILES, RENDER_CONFIG, SHARED_CACHE_CONFIG,
+    SOURCE_CONFIG, get_api_config
+)
+from alignment import align_series
+from downsample import target_points
+from decoding import decode_coingecko_prices, decode_polygon_bars, loads
+from http_client import HttpClient, get_http_client
+from metrics import metrics
+from price_series import PriceSeries
+from price_store import PriceStore
+from profiles import get_profile_stats
+from rate_limit import SharedTokenBucket, TokenBucket, backoff_delay, parse_retry_after
+from rollup import DAY_MS, INTERVAL_MS, choose_interval, roll_up
+from series_buffer import SeriesBuffer, SeriesWindow
+from shared_cache import SharedCache, get_shared_cache
+from sources import SourceHealth
 
-# Load environment variables
-load_dotenv()
+# matplotlib is only imported where charts are drawn (render.py), not at startup
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
-# Configuration
-plt.style.use("dark_background")
+# Configuration (environment variables are loaded by config)
 COMMAND_PREFIX = "!stonks"
 DEFAULT_TICKERS = ["BTC", "ETH", "XMR", "AVAX"]
 
 # API Configuration
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
 POLYGON_BASE_URL = "https://api.polygon.io/v2/aggs"
+POLYGON_MAX_BARS = 50000  # most bars Polygon returns per request
+# Bar sizes Polygon serves, finest first, as they appear in aggregate URLs
+POLYGON_INTERVALS = ("minute", "15minute", "hour", "day")
+POLYGON_TIMESPANS = {"minute": "1/minute", "15minute": "15/minute", "hour": "1/hour", "day": "1/day"}
 COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
 
 # Error messages
@@ -37,300 +61,847 @@ ERROR_MESSAGES = {
     "invalid_ticker": "Invalid ticker format. Use 'X:SYMBOL' for Polygon or 'symbol' for CoinGecko.",
     "api_error": "API request failed. Please try again later.",
     "no_data": "No data available for the specified ticker and time period.",
-    "rate_limit": "Rate limit exceeded. Please wait before making another request."
+    "rate_limit": "Rate limit exceeded. Please wait before making another request.",
+    "render_busy": "Too many charts are being generated right now. Please try again shortly.",
+    "queue_full": "The chart queue is full right now. Please try again in a minute.",
+    "user_busy": "You already have charts waiting. Please wait for them to finish.",
+    "unknown_profile": "Unknown output profile. Use --preview, --compact or --full.",
+    "unknown_coin": "Unknown CoinGecko ticker."
 }
 
 
+def polygon_interval(days: int, max_points: Optional[int] = None) -> str:
+    """Use the coarsest Polygon bars that still give every pixel column one, within a request's limit."""
+    # Alignment keeps two points (minimum and maximum) per pixel column
+    min_bars = max_points // 2 if max_points else None
+    return choose_interval(POLYGON_INTERVALS, days * DAY_MS, min_bars, POLYGON_MAX_BARS)
+
+
+def coingecko_interval(days: int) -> str:
+    """Mirror CoinGecko's automatic granularity for market charts."""
+    if days <= 1:
+        return "5minute"
+    return "hour" if days <= 90 else "day"
+
+
 class StonksError(Exception):
     """Custom exception for Stonks bot errors."""
     pass
 
 
+class SourceError(StonksError):
+    """A data source failed to answer (network, status or response errors), whatever the ticker."""
+    pass
+
+
 class DataProvider:
     """Base class for data providers."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Key into config.API_CONFIG
+    name = "base"
+    # Environment variables holding the API key, first one set wins
+    api_key_env: Tuple[str, ...] = ()
+    # Bar sizes that can be fetched or rolled up from each other, finest first
+    intervals: Tuple[str, ...] = ()
+    
+    def __init__(self, api_key: Optional[str] = None, store: Optional[PriceStore] = None,
+                 http: Optional[HttpClient] = None, shared: Optional[SharedCache] = None):
         self.api_key = api_key
-        self.http = urllib3.PoolManager()
+        self.store = store
+        self.http = http or get_http_client()
+        self.shared = shared
+        # Widest window fetched per (symbol, interval); narrower windows are views into it
+        self.buffer = SeriesBuffer(CACHE_CONFIG["series_buffer_max"])
+        self.api_config = get_api_config(self.name)
+        self.max_concurrency = self.api_config.get("max_concurrency", 4)
+        rate = self.api_config.get("requests_per_minute", 60) / 60
+        burst = self.api_config.get("burst", 1)
+        # With a shared cache, all processes using this API key draw from one limit
+        if shared is not None:
+            self.rate_limiter = SharedTokenBucket(shared, self.name, rate, burst)
+        else:
+            self.rate_limiter = TokenBucket(rate, burst)
+        # Blocking fetches run here; the pool size caps concurrent requests per provider
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix=f"{self.name}-fetch"
+        )
+    
+    async def fetch_historical_data(self, ticker: str, days: int,
+                                    max_points: Optional[int] = None) -> PriceSeries:
+        """Fetch historical price data without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (e.g. its request profile) into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, context.run, self.get_historical_data, ticker, days, max_points
+        )
+    
+    def get_historical_data(self, ticker: str, days: int,
+                            max_points: Optional[int] = None) -> PriceSeries:
+        """Get historical price data for the last number of days, at most as fine as a chart can show."""
+        symbol = self._resolve_symbol(ticker)
+        interval = self.get_interval(days, max_points)
+        
+        end_time = int(time.time() * 1000)
+        start_time = end_time - days * DAY_MS
+        
+        timestamps, prices = self._get_prices(symbol, interval, start_time, end_time)
+        
+        if len(timestamps) == 0:
+            raise StonksError(ERROR_MESSAGES["no_data"])
+        
+        # Views into the provider's window; nothing is copied
+        return PriceSeries(timestamps, prices, ticker, self.name, interval)
+    
+    def get_interval(self, days: int, max_points: Optional[int] = None) -> str:
+        """Get the bar interval to use for a window and chart size. Implemented by subclasses."""
+        raise NotImplementedError
+    
+    def provider_ticker(self, ticker: str) -> Optional[str]:
+        """Get this provider's form of a user ticker, or None if it cannot serve it. Implemented by subclasses."""
+        raise NotImplementedError
+    
+    def _resolve_symbol(self, ticker: str) -> str:
+        """Convert a user ticker to the API symbol. Implemented by subclasses."""
+        raise NotImplementedError
+    
+    def _fetch_range(self, symbol: str, interval: str, start_time: int,
+                     end_time: int, full: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Download (timestamps, prices) for a time range. Implemented by subclasses."""
+        raise NotImplementedError
+    
+    def _get_prices(self, symbol: str, interval: str, start_time: int,
+                    end_time: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get (timestamps, prices) for a window, from memory when a wider one was fetched."""
+        key = (symbol, interval)
+        window = self.buffer.get(key, start_time)
+        
+        # Another process may already have fetched (or topped up) this series
+        if self.shared is not None and (window is None or self._is_stale(window, end_time)):
+            window = self._adopt_shared(key, start_time, window)
+        
+        if window is None:
+            source = self._finer_window(symbol, interval, start_time, end_time)
+            if source is not None:
+                # Roll up finer bars already held instead of fetching
+                metrics.inc("stonks_series_buffer_total", provider=self.name, result="rollup")
+                timestamps, prices = roll_up(source.timestamps, source.prices, INTERVAL_MS[interval])
+                window = self.buffer.put(key, timestamps, prices, source.start, source.end)
+            else:
+                timestamps, prices = self._load_prices(symbol, interval, start_time, end_time)
+                window = self.buffer.put(key, timestamps, prices, start_time, end_time)
+                self._publish_shared(key, window)
+        elif self._is_stale(window, end_time):
+            window = self._top_up(symbol, interval, window, end_time)
+        else:
+            metrics.inc("stonks_series_buffer_total", provider=self.name, result="hit")
+        
+        return window.view(start_time)
+    
+    def _top_up(self, symbol: str, interval: str, window: SeriesWindow, end_time: int) -> SeriesWindow:
+        """Bring a stale window up to end_time, from finer bars when they are held."""
+        key = (symbol, interval)
+        # Only the tail is needed, starting at the last (possibly incomplete) bar
+        step = INTERVAL_MS[interval]
+        fetch_start = window.last_timestamp - window.last_timestamp % step
+        
+        source = self._finer_window(symbol, interval, fetch_start, end_time)
+        if source is not None:
+            metrics.inc("stonks_series_buffer_total", provider=self.name, result="rollup")
+            timestamps, prices = roll_up(*source.view(fetch_start), step)
+            return self.buffer.extend(key, window, timestamps, prices, source.end)
+        
+        metrics.inc("stonks_series_buffer_total", provider=self.name, result="topup")
+        timestamps, prices = self._fetch_range(symbol, interval, fetch_start, end_time, full=False)
+        timestamps, prices = _last_per_interval(timestamps, prices, step)
+        if self.store is not None:
+            self.store.save(self.name, symbol, interval, timestamps, prices, fetch_start, end_time)
+        window = self.buffer.extend(key, window, timestamps, prices, end_time)
+        self._publish_shared(key, window)
+        return window
+    
+    def _is_stale(self, window: SeriesWindow, end_time: int) -> bool:
+        """Whether a window is old enough to need a top-up fetch."""
+        return end_time - window.end >= CACHE_CONFIG["min_refresh_seconds"] * 1000
+    
+    def _finer_window(self, symbol: str, interval: str, start_time: int,
+                      end_time: int) -> Optional[SeriesWindow]:
+        """Find a fresh window of finer bars covering start_time, to roll up from."""
+        if interval not in self.intervals:
+            return None
+        
+        # The coarsest finer bars are the cheapest to roll up
+        for finer in reversed(self.intervals[:self.intervals.index(interval)]):
+            window = self.buffer.get((symbol, finer), start_time)
+            if window is not None and not self._is_stale(window, end_time):
+                return window
+        return None
+    
+    def _shared_key(self, key: Tuple[str, str]) -> str:
+        """Get the shared cache key for a price series."""
+        return f"prices:{self.name}:{key[0]}:{key[1]}"
+    
+    def _adopt_shared(self, key: Tuple[str, str], start_time: int,
+                      window: Optional[SeriesWindow]) -> Optional[SeriesWindow]:
+        """Use the shared copy of a series if it covers the window and is newer than ours."""
+        entry = self.shared.get(self._shared_key(key))
+        if entry is None:
+            return window
+        
+        shared = SeriesWindow.from_bytes(entry[0])
+        if shared.start > start_time or (window is not None and shared.end <= window.end):
+            return window
+        
+        metrics.inc("stonks_shared_cache_total", kind="prices", result="hit")
+        return self.buffer.put(key, shared.timestamps, shared.prices, shared.start, shared.end)
+    
+    def _publish_shared(self, key: Tuple[str, str], window: SeriesWindow) -> None:
+        """Share a freshly fetched series with the other processes."""
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), window.to_bytes(), SHARED_CACHE_CONFIG["price_ttl"])
+    
+    def _load_prices(self, symbol: str, interval: str, start_time: int,
+                     end_time: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get (timestamps, prices) for a window, topping up the local store."""
+        if self.store is None:
+            return self._fetch_range(symbol, interval, start_time, end_time, full=True)
+        
+        coverage = self.store.get_coverage(self.name, symbol, interval)
+        
+        if coverage is None or coverage[0] > start_time:
+            # Nothing usable cached, fetch the whole window
+            metrics.inc("stonks_price_cache_total", provider=self.name, result="miss")
+            timestamps, prices = self._fetch_range(symbol, interval, start_time, end_time, full=True)
+            self.store.save(
+                self.name, symbol, interval, timestamps, prices,
+                start_time, end_time, replace=True
+            )
+            return timestamps, prices
+        
+        if end_time - coverage[1] >= CACHE_CONFIG["min_refresh_seconds"] * 1000:
+            # Fetch only the tail, starting at the last (possibly incomplete) bar
+            metrics.inc("stonks_price_cache_total", provider=self.name, result="topup")
+            step = INTERVAL_MS[interval]
+            last_timestamp = self.store.get_last_timestamp(self.name, symbol, interval) or coverage[1]
+            fetch_start = last_timestamp - last_timestamp % step
+            
+            timestamps, prices = self._fetch_range(symbol, interval, fetch_start, end_time, full=False)
+            timestamps, prices = _last_per_interval(timestamps, prices, step)
+            self.store.save(self.name, symbol, interval, timestamps, prices, fetch_start, end_time)
+        else:
+            metrics.inc("stonks_price_cache_total", provider=self.name, result="hit")
+        
+        with metrics.span("price_store", provider=self.name):
+            return self.store.load(self.name, symbol, interval, start_time)
+    
+    def _request(self, url: str) -> bytes:
+        """Make HTTP request with rate limiting and retries, returning the raw body."""
+        max_retries = self.api_config.get("max_retries", 0)
+        
+        for attempt in range(max_retries + 1):
+            # Queue locally rather than spend a request on a likely 429
+            waited = self.rate_limiter.acquire()
+            if waited:
+                metrics.record("rate_limit_wait", waited, provider=self.name)
+            retry_after = None
+            rate_limited = False
+            
+            try:
+                with metrics.span("network", provider=self.name):
+                    response = self.http.request("GET", url)
+            except (HTTPError, RequestError, TimeoutError) as e:
+                error = SourceError(f"Network error: {str(e)}")
+            except Exception as e:
+                raise SourceError(f"Unexpected error: {str(e)}")
+            else:
+                if response.status == 200:
+                    return response.data
+                
+                if response.status not in RETRYABLE_STATUSES:
+                    # Not found is about the ticker, not the source
+                    error_class = StonksError if response.status == 404 else SourceError
+                    raise error_class(f"API request failed with status {response.status}")
+                
+                rate_limited = response.status == 429
+                if rate_limited:
+                    metrics.inc("stonks_rate_limited_total", provider=self.name)
+                    error = SourceError(ERROR_MESSAGES["rate_limit"])
+                else:
+                    error = SourceError(f"API request failed with status {response.status}")
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            
+            if attempt < max_retries:
+                delay = backoff_delay(
+                    attempt, self.api_config.get("backoff_base", 1),
+                    self.api_config.get("rate_limit_delay", 60), retry_after
+                )
+                if rate_limited:
+                    # Every request to this API would hit the same limit
+                    self.rate_limiter.pause(delay)
+                metrics.inc("stonks_retries_total", provider=self.name)
+                print(f"{self.name} request failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        
+        raise error
+    
+    def _decode(self, decoder: Callable[[bytes], Tuple[np.ndarray, np.ndarray]],
+                body: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode a response body into (timestamps, prices) columns."""
+        try:
+            with metrics.span("decode", provider=self.name):
+                return decoder(body)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise SourceError(f"Invalid JSON response: {str(e)}")
     
     def _make_request(self, url: str) -> dict:
-        """Make HTTP request with error handling."""
+        """Make HTTP request and parse the JSON body."""
+        body = self._request(url)
         try:
-            response = self.http.request("GET", url)
-            if response.status == 429:
-                raise StonksError(ERROR_MESSAGES["rate_limit"])
-            elif response.status != 200:
-                raise StonksError(f"API request failed with status {response.status}")
-            
-            return json.loads(response.data)
-        except (HTTPError, RequestError, TimeoutError) as e:
-            raise StonksError(f"Network error: {str(e)}")
-        except json.JSONDecodeError as e:
-            raise StonksError(f"Invalid JSON response: {str(e)}")
-        except Exception as e:
-            raise StonksError(f"Unexpected error: {str(e)}")
+            return loads(body)
+        except ValueError as e:
+            raise SourceError(f"Invalid JSON response: {str(e)}")
+
+
+# Provider classes by name, as used in config.SOURCE_CONFIG routes
+PROVIDER_CLASSES: Dict[str, Type[DataProvider]] = {}
 
 
+def register_provider(cls: Type[DataProvider]) -> Type[DataProvider]:
+    """Register a provider class under its name, so routes can use it (also works as a decorator)."""
+    PROVIDER_CLASSES[cls.name] = cls
+    return cls
+
+
+@register_provider
 class PolygonProvider(DataProvider):
     """Polygon.io data provider for stocks and some cryptocurrencies."""
     
-    def get_historical_data(self, ticker: str, days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """Get historical price data from Polygon.io."""
+    name = "polygon"
+    api_key_env = ("POLYGON",)
+    base_url = POLYGON_BASE_URL
+    intervals = POLYGON_INTERVALS
+    
+    def get_interval(self, days: int, max_points: Optional[int] = None) -> str:
+        """Use the coarsest bars that still give every pixel column one, within a request's limit."""
+        return polygon_interval(days, max_points)
+    
+    def provider_ticker(self, ticker: str) -> Optional[str]:
+        """Serve X: tickers only; coin symbols have no reliable Polygon form."""
+        return ticker if ticker.startswith("X:") else None
+    
+    def _resolve_symbol(self, ticker: str) -> str:
+        """Validate a Polygon ticker and strip its X: prefix."""
         if not self.api_key:
-            raise StonksError(ERROR_MESSAGES["api_key_missing"])
+            # The source is unusable, whatever the ticker
+            raise SourceError(ERROR_MESSAGES["api_key_missing"])
         
         if not ticker.startswith("X:"):
             raise StonksError(ERROR_MESSAGES["invalid_ticker"])
         
-        print(f"Fetching data for {ticker} from Polygon.io...")
-        
         # Remove X: prefix for Polygon API calls
-        clean_ticker = ticker.replace("X:", "")
-        
-        end_time = int(time.time() * 1000)
-        start_time = end_time - days * 24 * 60 * 60 * 1000
-        interval = "day" if days > 60 else "minute"
-        
-        url = f"{POLYGON_BASE_URL}/ticker/{clean_ticker}/range/1/{interval}/{start_time}/{end_time}?limit=50000&apiKey={self.api_key}"
-        
-        data = self._make_request(url)
-        
-        if not data.get("results"):
-            print(f"Polygon API response for {clean_ticker}: {data}")
-            raise StonksError(ERROR_MESSAGES["no_data"])
+        return ticker.replace("X:", "")
+    
+    def _fetch_range(self, symbol: str, interval: str, start_time: int,
+                     end_time: int, full: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Get historical price data from Polygon.io."""
+        print(f"Fetching data for {symbol} from Polygon.io...")
         
-        # Extract data before converting to numpy arrays
-        results = data["results"]
-        print(f"Successfully fetched {len(results)} data points for {clean_ticker}")
+        pages = []
+        page_start = start_time
+        while True:
+            body = self._request(self.range_url(symbol, interval, page_start, end_time))
+            timestamps, prices = self._decode(decode_polygon_bars, body)
+            pages.append((timestamps, prices))
+            # A truncated response links to a next page, which starts after its last bar
+            if b'"next_url"' not in body or len(timestamps) == 0:
+                break
+            page_start = int(timestamps[-1]) + 1
         
-        prices = np.array([result["c"] for result in results])
-        timestamps = np.array([result["t"] for result in results])
+        if len(pages) > 1:
+            timestamps = np.concatenate([page[0] for page in pages])
+            prices = np.concatenate([page[1] for page in pages])
         
-        # Convert timestamps to readable dates
-        readable_dates = np.array([
-            datetime.datetime.fromtimestamp(ts / 1000, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
-            for ts in timestamps
-        ])
+        if len(timestamps) == 0:
+            print(f"Polygon API response for {symbol}: {body[:500].decode(errors='replace')}")
+        else:
+            print(f"Successfully fetched {len(timestamps)} data points for {symbol}")
         
-        return prices, readable_dates, timestamps
+        return timestamps, prices
+    
+    def range_url(self, symbol: str, interval: str, start_time: int, end_time: int) -> str:
+        """Build the aggregates URL for a symbol, bar interval and time range."""
+        return (
+            f"{self.base_url}/ticker/{symbol}/range/{POLYGON_TIMESPANS[interval]}/{start_time}/{end_time}"
+            f"?limit={POLYGON_MAX_BARS}&apiKey={self.api_key}"
+        )
 
 
+@register_provider
 class CoinGeckoProvider(DataProvider):
     """CoinGecko data provider for cryptocurrencies."""
     
-    def get_historical_data(self, ticker: str, days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    name = "coingecko"
+    # Try both COINGECKO and COIN_GECKO environment variables
+    api_key_env = ("COINGECKO", "COIN_GECKO")
+    base_url = COINGECKO_BASE_URL
+    
+    def __init__(self, api_key: Optional[str] = None, store: Optional[PriceStore] = None,
+                 http: Optional[HttpClient] = None, shared: Optional[SharedCache] = None):
+        super().__init__(api_key, store, http, shared)
+        # Symbol -> coin id index, loaded from disk now and refreshed from the API when stale
+        self.coin_index = CoinIndex(
+            CACHE_CONFIG["coin_index_path"],
+            CACHE_CONFIG["coin_index_ttl"],
+            COINGECKO_TICKER_MAPPING
+        )
+        self.coin_index.load()
+        self._index_lock = threading.Lock()
+        self._index_retry_at = 0.0
+    
+    def get_interval(self, days: int, max_points: Optional[int] = None) -> str:
+        """Mirror CoinGecko's automatic granularity for market charts."""
+        return coingecko_interval(days)
+    
+    def provider_ticker(self, ticker: str) -> Optional[str]:
+        """Serve coin symbols, and X:<COIN>USD pairs as their coin."""
+        if not ticker.startswith("X:"):
+            return ticker
+        pair = ticker[2:].upper()
+        return pair[:-3] if pair.endswith("USD") and len(pair) > 3 else None
+    
+    def _resolve_symbol(self, ticker: str) -> str:
+        """Convert ticker to CoinGecko format."""
+        return self._get_coin_id(ticker)
+    
+    def _fetch_range(self, symbol: str, interval: str, start_time: int,
+                     end_time: int, full: bool) -> Tuple[np.ndarray, np.ndarray]:
         """Get historical price data from CoinGecko."""
-        print(f"Fetching data for {ticker} from CoinGecko...")
-        
-        # Convert ticker to CoinGecko format
-        coin_id = self._get_coin_id(ticker)
+        print(f"Fetching data for {symbol} from CoinGecko...")
         
-        url = f"{COINGECKO_BASE_URL}/coins/{coin_id}/market_chart?vs_currency=usd&days={days}"
-        
-        # Add API key if available
-        if self.api_key:
-            url += f"&x_cg_demo_api_key={self.api_key}"
+        if full:
+            days = round((end_time - start_time) / DAY_MS)
+            url = f"{self.base_url}/coins/{symbol}/market_chart?vs_currency=usd&days={days}"
+        else:
+            url = (
+                f"{self.base_url}/coins/{symbol}/market_chart/range?vs_currency=usd"
+                f"&from={start_time // 1000}&to={end_time // 1000}"
+            )
         
-        data = self._make_request(url)
+        body = self._request(self._with_api_key(url))
+        timestamps, prices = self._decode(decode_coingecko_prices, body)
         
-        if not data.get("prices"):
+        if len(timestamps) == 0 and full:
             raise StonksError(ERROR_MESSAGES["no_data"])
         
-        prices = np.array([price[1] for price in data["prices"]])
-        timestamps = np.array([price[0] for price in data["prices"]])
-        
-        # Convert timestamps to readable dates
-        readable_dates = np.array([
-            datetime.datetime.fromtimestamp(ts / 1000, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
-            for ts in timestamps
-        ])
-        
-        return prices, readable_dates, timestamps
+        return timestamps, prices
+    
+    def _with_api_key(self, url: str) -> str:
+        """Add the API key to a request URL if one is configured."""
+        if not self.api_key:
+            return url
+        return url + ("&" if "?" in url else "?") + f"x_cg_demo_api_key={self.api_key}"
     
     def _get_coin_id(self, ticker: str) -> str:
         """Convert ticker to CoinGecko coin ID."""
-        # Common ticker mappings
-        ticker_mapping = {
-            "BTC": "bitcoin",
-            "ETH": "ethereum",
-            "XMR": "monero",
-            "AVAX": "avalanche-2",
-            "ADA": "cardano",
-            "DOT": "polkadot",
-            "LINK": "chainlink",
-            "LTC": "litecoin",
-            "BCH": "bitcoin-cash",
-            "XRP": "ripple"
-        }
-        
         # Remove 'X:' prefix if present
         clean_ticker = ticker.replace("X:", "")
         
-        if clean_ticker in ticker_mapping:
-            return ticker_mapping[clean_ticker]
+        # Curated mappings need no coin list
+        if clean_ticker.upper() not in self.coin_index.pinned:
+            self.refresh_coin_index()
         
-        # If not in mapping, try to use the ticker as-is
-        return clean_ticker.lower()
+        coin_id = self.coin_index.resolve(clean_ticker)
+        if coin_id is None:
+            message = ERROR_MESSAGES["unknown_coin"]
+            suggestions = self.coin_index.suggest(clean_ticker)
+            if suggestions:
+                message += f" Did you mean {', '.join(suggestions)}?"
+            raise StonksError(message)
+        return coin_id
+    
+    def refresh_coin_index(self) -> None:
+        """Fetch the coin list and market cap ranking if the index is stale."""
+        with self._index_lock:
+            if not self.coin_index.is_stale() or time.time() < self._index_retry_at:
+                return
+            
+            print("Fetching coin list from CoinGecko...")
+            try:
+                coins = self._make_request(self._with_api_key(f"{self.base_url}/coins/list"))
+                markets = self._make_request(self._with_api_key(
+                    f"{self.base_url}/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=250&page=1"
+                ))
+                ranks = {
+                    market["id"]: market["market_cap_rank"]
+                    for market in markets if market.get("market_cap_rank")
+                }
+                self.coin_index.update(coins, ranks)
+                print(f"Indexed {len(coins)} CoinGecko coins")
+            except (StonksError, KeyError, TypeError) as e:
+                # Keep using the previous (or no) coin list for a while
+                print(f"Could not fetch CoinGecko coin list: {e}")
+                self._index_retry_at = time.time() + CACHE_CONFIG["coin_index_retry_seconds"]
+
+
+def _settles(error: StonksError, ticker: str, provider_ticker: str) -> bool:
+    """Whether a source's error settles a ticker: it rejected the ticker as given, rather than failing itself."""
+    # A rejected translation (BTC asked as X:BTCUSD) only means that source lacks it
+    return not isinstance(error, SourceError) and provider_ticker == ticker
+
+
+def _discard_result(task: asyncio.Future) -> None:
+    """Retrieve a background task's outcome so a failure is not reported as unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+
+def format_date_labels(dates: np.ndarray) -> np.ndarray:
+    """Format datetime64 values as 'YYYY-MM-DD HH:MM UTC' labels."""
+    labels = np.datetime_as_string(dates, unit="m")
+    return np.char.add(np.char.replace(labels, "T", " "), " UTC")
+
+
+def _last_per_interval(timestamps: np.ndarray, prices: np.ndarray,
+                       step: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep only the newest point in each interval-sized bucket."""
+    if len(timestamps) == 0:
+        return timestamps, prices
+    
+    buckets = timestamps // step
+    keep = np.append(buckets[1:] != buckets[:-1], True)
+    return timestamps[keep], prices[keep]
 
 
 class StonksChart:
     """Main class for creating stonks charts."""
     
     def __init__(self):
-        self.polygon_provider = PolygonProvider(os.getenv("POLYGON"))
-        # Try both COINGECKO and COIN_GECKO environment variables
-        coingecko_api_key = os.getenv("COINGECKO") or os.getenv("COIN_GECKO")
-        self.coingecko_provider = CoinGeckoProvider(coingecko_api_key)
+        # Local price history shared by all providers
+        store_path = CACHE_CONFIG["price_store_path"]
+        self.price_store = PriceStore(store_path) if store_path else None
+        
+        # Prices and rate limits shared with the other bot processes, if any
+        shared = get_shared_cache()
+        
+        # One provider per data source named in the routes
+        self.routes = SOURCE_CONFIG["routes"]
+        self.providers: Dict[str, DataProvider] = {}
+        for name in dict.fromkeys(name for route in self.routes.values() for name in route):
+            if name not in PROVIDER_CLASSES:
+                raise ValueError(f"Unknown data source in SOURCE_CONFIG routes: {name}")
+            cls = PROVIDER_CLASSES[name]
+            api_key = next(filter(None, (os.getenv(env) for env in cls.api_key_env)), None)
+            self.providers[name] = cls(api_key, self.price_store, shared=shared)
+        
+        # Latency and failures per source, which order and hedge fetches
+        self.health = SourceHealth(SOURCE_CONFIG)
     
-    def _get_data_provider(self, ticker: str) -> DataProvider:
-        """Determine which data provider to use based on ticker format."""
-        if ticker.startswith("X:"):
-            return self.polygon_provider
-        else:
-            return self.coingecko_provider
+    def _get_route(self, ticker: str) -> List[str]:
+        """Get the names of the sources configured for a ticker, most preferred first."""
+        prefix = max((prefix for prefix in self.routes if ticker.startswith(prefix)), key=len, default=None)
+        return self.routes[prefix] if prefix is not None else []
     
-    async def create_chart(self, days: Union[str, int], tickers: List[str]) -> plt.Figure:
-        """Create a normalized price comparison chart."""
-        days_int = int(days)
-        
-        # Fetch data for all tickers
-        all_prices = []
-        all_timestamps = []
-        all_readable_dates = []
+    def _get_sources(self, ticker: str, ranked: bool = True) -> List[Tuple[DataProvider, str]]:
+        """Get the providers able to serve a ticker with their form of it, ranked by health or in configured order."""
+        forms = {}
+        for name in self._get_route(ticker):
+            provider_ticker = self.providers[name].provider_ticker(ticker)
+            if provider_ticker is not None:
+                forms[name] = provider_ticker
         
+        names = list(forms)
+        if ranked:
+            names = self.health.rank(names, native=[name for name in names if forms[name] == ticker])
+        return [(self.providers[name], forms[name]) for name in names]
+    
+    def _get_source(self, ticker: str) -> Tuple[DataProvider, str]:
+        """Get the provider currently preferred for a ticker, with its form of the ticker."""
+        sources = self._get_sources(ticker)
+        if not sources:
+            raise StonksError(ERROR_MESSAGES["invalid_ticker"])
+        return sources[0]
+    
+    def _get_data_provider(self, ticker: str) -> DataProvider:
+        """Get the provider currently preferred for a ticker."""
+        return self._get_source(ticker)[0]
+    
+    async def validate_tickers(self, tickers: List[str]) -> None:
+        """Reject tickers that no source can serve, before any price is fetched."""
+        loop = asyncio.get_running_loop()
         for ticker in tickers:
-            try:
-                provider = self._get_data_provider(ticker)
-                prices, readable_dates, timestamps = provider.get_historical_data(ticker, days_int)
-                
-                all_prices.append(prices)
-                all_timestamps.append(timestamps)
-                all_readable_dates.append(readable_dates)
+            sources = self._get_sources(ticker, ranked=False)
+            if not sources:
+                raise StonksError(ERROR_MESSAGES["invalid_ticker"])
+            
+            errors = []
+            for provider, provider_ticker in sources:
+                try:
+                    # Resolution may refresh the coin list, so keep it off the event loop
+                    await loop.run_in_executor(provider._executor, provider._resolve_symbol, provider_ticker)
+                    break
+                except StonksError as e:
+                    if _settles(e, ticker, provider_ticker):
+                        raise
+                    errors.append(e)
+            else:
+                # No source can serve it; report the most preferred one's reason
+                raise errors[0]
+    
+    async def fetch_prices(self, ticker: str, days: int, max_points: Optional[int] = None) -> PriceSeries:
+        """Fetch a ticker from its sources, asking the next one when a source is slow, fails or lacks it."""
+        sources = self._get_sources(ticker)
+        if not sources:
+            raise StonksError(ERROR_MESSAGES["invalid_ticker"])
+        
+        loop = asyncio.get_running_loop()
+        running: Dict[asyncio.Future, int] = {}
+        errors: Dict[int, StonksError] = {}
+        try:
+            for position, (provider, provider_ticker) in enumerate(sources):
+                if position:
+                    metrics.inc("stonks_source_hedges_total", source=provider.name)
+                task = asyncio.ensure_future(
+                    self._fetch_from(provider, ticker, provider_ticker, days, max_points)
+                )
+                running[task] = position
+                last = position == len(sources) - 1
                 
-            except StonksError as e:
-                print(f"Error fetching data for {ticker}: {e}")
-                continue
+                # Give the source its usual worst-case latency before also asking the next one;
+                # after a failure the next one is asked at once
+                deadline = loop.time() + self.health.hedge_delay(provider.name)
+                while running:
+                    timeout = None if last else max(0.0, deadline - loop.time())
+                    done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    for finished in done:
+                        index = running.pop(finished)
+                        error = finished.exception()
+                        if error is None:
+                            return finished.result()
+                        if not isinstance(error, StonksError) or _settles(error, ticker, sources[index][1]):
+                            raise error
+                        errors[index] = error
+                    if not last:
+                        break
+        finally:
+            # Slower sources finish in the background, still filling their caches and stats
+            for task in running:
+                task.add_done_callback(_discard_result)
         
-        if len(all_prices) == 0:
-            raise StonksError("No data could be fetched for any ticker")
+        # Report the error of the source configured as most preferred
+        route = self._get_route(ticker)
+        raise errors[min(errors, key=lambda index: route.index(sources[index][0].name))]
+    
+    async def _fetch_from(self, provider: DataProvider, ticker: str, provider_ticker: str,
+                          days: int, max_points: Optional[int]) -> PriceSeries:
+        """Fetch a ticker from one source, recording the source's latency and health."""
+        start = time.perf_counter()
+        try:
+            series = await provider.fetch_historical_data(provider_ticker, days, max_points)
+        except StonksError as e:
+            # Only failures of the source itself count against its health
+            if isinstance(e, SourceError):
+                self.health.record_failure(provider.name)
+            metrics.inc(
+                "stonks_source_requests_total", source=provider.name,
+                result="error" if isinstance(e, SourceError) else "rejected"
+            )
+            raise
+        
+        elapsed = time.perf_counter() - start
+        self.health.record_success(provider.name, elapsed)
+        metrics.inc("stonks_source_requests_total", source=provider.name, result="ok")
+        metrics.observe("stonks_source_seconds", elapsed, source=provider.name)
+        
+        # Label the series with the ticker asked for, whichever source served it
+        series.ticker = ticker
+        return series
+    
+    async def get_chart_data(self, days: Union[str, int], tickers: List[str],
+                             max_points: Optional[int] = None) -> ChartData:
+        """Fetch all tickers and prepare normalized chart data."""
+        days_int = int(days)
         
-        # Find the oldest timestamp to align all data
-        # Find the array with the earliest timestamp
-        min_index = 0
-        min_timestamp = float('inf')
-        for i, timestamps in enumerate(all_timestamps):
-            if len(timestamps) > 0 and timestamps[0] < min_timestamp:
-                min_timestamp = timestamps[0]
-                min_index = i
-        
-        oldest_timestamps = all_timestamps[min_index]
-        oldest_readable_dates = all_readable_dates[min_index]
-        
-        # Create the chart
-        fig = self._create_matplotlib_chart(
-            days_int, tickers, all_prices, all_timestamps, 
-            oldest_timestamps, oldest_readable_dates
+        # Fetch data for all tickers concurrently
+        results = await asyncio.gather(
+            *(
+                self.fetch_prices(ticker, days_int, max_points)
+                for ticker in tickers
+            ),
+            return_exceptions=True
         )
         
-        return fig
-    
-    def _create_matplotlib_chart(
-        self, 
-        days: int, 
-        tickers: List[str], 
-        all_prices: List[np.ndarray], 
-        all_timestamps: List[np.ndarray],
-        oldest_timestamps: np.ndarray,
-        oldest_readable_dates: np.ndarray
-    ) -> plt.Figure:
-        """Create the matplotlib chart with the given data."""
-        fig = plt.figure(figsize=(15, 6))
+        return self.build_chart_data(days_int, tickers, results, max_points)
+    
+    def build_chart_data(self, days: int, tickers: List[str], results: List,
+                         max_points: Optional[int] = None) -> ChartData:
+        """Prepare chart data from per-ticker fetch results or StonksErrors."""
+        series = []
         
-        # Define ticks
-        ticks_num = 11
-        ticks = np.int32(np.linspace(0, oldest_timestamps.shape[0] - 1, ticks_num))
-        mini = 1
-        
-        # Plot each ticker
-        for i, (prices, timestamps) in enumerate(zip(all_prices, all_timestamps)):
-            # Normalize prices
-            normalized = prices / prices.max()
-            
-            # Plot line
-            plt.plot(timestamps, normalized, linewidth=3, label=tickers[i])
-            
-            # Add price labels for the first ticker
-            if i == 0:
-                self._add_price_labels(timestamps, normalized, prices, ticks_num)
+        for ticker, result in zip(tickers, results):
+            if isinstance(result, StonksError):
+                print(f"Error fetching data for {ticker}: {result}")
+                sources = self._get_sources(ticker)
+                metrics.inc("stonks_dropped_tickers_total", provider=sources[0][0].name if sources else "none")
+                continue
+            if isinstance(result, BaseException):
+                raise result
             
-            # Track global minimum
-            norm_mini = normalized.min()
-            if norm_mini < mini:
-                mini = norm_mini
+            series.append(result)
+        
+        if len(series) == 0:
+            raise StonksError("No data could be fetched for any ticker")
+        
+        with metrics.span("normalize"):
+            return self._prepare_chart_data(days, series, max_points)
+    
+    def _prepare_chart_data(self, days: int, series: List[PriceSeries],
+                            max_points: Optional[int] = None) -> ChartData:
+        """Align all series on a shared time grid, normalize them and compute the axis data."""
+        # Resample the normalized series onto one grid, keeping only what the figure can show
+        grid, normalized = align_series(
+            [item.timestamps for item in series], [item.normalized for item in series], max_points
+        )
+        maxima = np.array([item.max for item in series])
+        prices = normalized * maxima[:, None]
+        mini = min(1, min(item.min / item.max for item in series))
         
         # Set minimum y-limit
         if mini > 0.9:
             mini = 0.9
         
-        # Configure chart appearance
-        self._configure_chart_appearance(
-            days, oldest_timestamps, oldest_readable_dates, 
-            ticks, mini, tickers
-        )
+        # Define ticks
+        ticks = np.int32(np.linspace(0, grid.shape[0] - 1, TICKS_NUM))
         
-        return fig
-    
-    def _add_price_labels(self, timestamps: np.ndarray, normalized: np.ndarray, 
-                         prices: np.ndarray, ticks_num: int) -> None:
-        """Add price labels to the chart."""
-        ticks_positions = np.int32(
-            np.linspace(0, timestamps.shape[0] - 1, ticks_num)
+        return ChartData(
+            days=days,
+            tickers=[item.ticker for item in series],
+            prices=prices,
+            normalized=normalized,
+            timestamps=grid,
+            x_ticks=grid[ticks],
+            x_labels=format_date_labels(grid[ticks].view("datetime64[ms]")),
+            x_limits=(grid[0], grid[-1]),
+            y_min=mini,
+            interval=min((item.interval for item in series), key=INTERVAL_MS.__getitem__)
         )
-        
-        for x, y, price in zip(
-            timestamps[ticks_positions],
-            normalized[ticks_positions],
-            prices[ticks_positions]
-        ):
-            plt.text(
-                x, y, f"{price:.2f}",
-                color="white", size=8, rotation=90,
-                path_effects=[pe.withStroke(linewidth=2, foreground="black")]
+    
+    async def create_chart(self, days: Union[str, int], tickers: List[str]) -> "Figure":
+        """Create a normalized price comparison chart."""
+        data = await self.get_chart_data(days, tickers, target_points(FIGURE_SIZE[0], 300))
+        return self._create_matplotlib_chart(data)
+    
+    def _create_matplotlib_chart(self, data: ChartData) -> "Figure":
+        """Create the matplotlib chart with the given data."""
+        from render import build_figure
+        return build_figure(data)
+
+
+def available_cpus() -> int:
+    """Count the CPU cores this process may run on."""
+    # The affinity mask honours taskset/cpuset limits that os.cpu_count() ignores
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_render_worker() -> None:
+    """Import the renderer in a new worker process and warm it up."""
+    from render import init_worker
+    init_worker()
+
+
+def _render_in_worker(data: ChartData, format: str, dpi: int, colors: Optional[int],
+                      quality: Optional[int]) -> Tuple[bytes, float, float]:
+    """Render a chart inside a worker, so only the workers import matplotlib."""
+    from render import render_chart_timed
+    return render_chart_timed(data, format, dpi, colors, quality)
+
+
+class ChartRenderer:
+    """Process pool that encodes charts off the event loop."""
+    
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 16):
+        self.workers = workers or min(available_cpus(), RENDER_CONFIG["default_workers_max"])
+        self.max_queue = max_queue
+        self._executor = None
+        self._slots = None
+        self._loop = None
+        self._waiting = 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_worker
             )
+        return self._executor
     
-    def _configure_chart_appearance(self, days: int, oldest_timestamps: np.ndarray,
-                                  oldest_readable_dates: np.ndarray, ticks: np.ndarray,
-                                  mini: float, tickers: List[str]) -> None:
-        """Configure the chart's visual appearance."""
-        # X-axis configuration
-        plt.gca().set_xticks(oldest_timestamps[ticks])
-        plt.gca().set_xticklabels(oldest_readable_dates[ticks], rotation=45, ha="right")
-        
-        # Y-axis configuration
-        price_ticks = np.linspace(0, 1, 11)
-        plt.gca().set_yticks(price_ticks)
-        plt.gca().set_yticklabels((price_ticks * 100).astype(int))
-        plt.gca().set_ylim(mini - 0.05, 1.05)
-        
-        # Chart limits and grid
-        plt.gca().set_xlim(oldest_timestamps[0], oldest_timestamps[-1])
-        plt.grid(linewidth=2, color="#595959", linestyle="--")
+    def start(self) -> None:
+        """Start one worker process now instead of on the first render; the rest start as renders overlap."""
+        self._get_executor().submit(os.getpid)
+    
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Get the in-flight render limit for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._loop = loop
+        return self._slots
+    
+    async def render(self, data: ChartData, format: str = "png", dpi: int = 300,
+                     colors: Optional[int] = None, quality: Optional[int] = None,
+                     profile: Optional[str] = None) -> bytes:
+        """Render chart data in a worker process and return the image bytes."""
+        slots = self._get_slots()
         
-        # Legend and labels
-        plt.legend(tickers, bbox_to_anchor=(1.02, 1), loc="upper left")
-        plt.xlabel("Time")
-        plt.ylabel("Normalized Price (%)")
+        # Shed load once too many renders are already waiting for a worker
+        if slots.locked() and self._waiting >= self.max_queue:
+            raise StonksError(ERROR_MESSAGES["render_busy"])
         
-        # Title
-        title = f"{('Last day' if days == 1 else f'{days} days')} asset price comparison"
-        plt.title(title)
+        self._waiting += 1
+        try:
+            with metrics.span("render_queue"):
+                await slots.acquire()
+        finally:
+            self._waiting -= 1
         
-        plt.tight_layout()
+        try:
+            loop = asyncio.get_running_loop()
+            image, plot_seconds, encode_seconds = await loop.run_in_executor(
+                self._get_executor(), _render_in_worker, data, format, dpi, colors, quality
+            )
+            metrics.record("plot", plot_seconds)
+            metrics.record("encode", encode_seconds, format=format, profile=profile or "custom")
+            metrics.inc("stonks_chart_bytes_total", len(image), profile=profile or "custom")
+            if profile:
+                get_profile_stats().record_encode(profile, encode_seconds, len(image))
+            return image
+        except BrokenProcessPool as e:
+            # A worker died; start a fresh pool for the next render
+            self._executor = None
+            raise StonksError(f"Render worker crashed: {str(e)}")
+        finally:
+            slots.release()
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
 
 # Global chart instance
 _chart_instance = None
 
+# Global renderer instance
+_renderer_instance = None
+
+# Global rendered chart cache
+_chart_cache_instance = None
+
 
 def get_chart_instance() -> StonksChart:
     """Get or create the global chart instance."""
@@ -340,45 +911,141 @@ def get_chart_instance() -> StonksChart:
     return _chart_instance
 
 
-async def get_fig(days: Union[str, int], tickers: List[str]) -> plt.Figure:
+def get_renderer() -> ChartRenderer:
+    """Get or create the global renderer instance."""
+    global _renderer_instance
+    if _renderer_instance is None:
+        _renderer_instance = ChartRenderer(
+            workers=RENDER_CONFIG["workers"],
+            max_queue=RENDER_CONFIG["max_queue"]
+        )
+    return _renderer_instance
+
+
+async def get_fig(days: Union[str, int], tickers: List[str]) -> "Figure":
     """Get a figure for the specified days and tickers."""
     chart = get_chart_instance()
     return await chart.create_chart(days, tickers)
 
 
-def main(save: bool = False, format: str = 'png') -> None:
+def get_chart_cache() -> ChartCache:
+    """Get or create the global rendered chart cache."""
+    global _chart_cache_instance
+    if _chart_cache_instance is None:
+        _chart_cache_instance = ChartCache(
+            CACHE_CONFIG["chart_cache_max_bytes"], get_shared_cache(), SHARED_CACHE_CONFIG["timeout"]
+        )
+    return _chart_cache_instance
+
+
+def chart_key(days: Union[str, int], tickers: List[str], profile: str = "full") -> Tuple:
+    """Build the canonical cache key for a chart request."""
+    # Ticker order sets line colours, legend order and price labels, so only duplicates are dropped
+    return (int(days), tuple(dict.fromkeys(tickers)), profile)
+
+
+def get_output_profile(name: str) -> dict:
+    """Get the encoding options of an output profile."""
+    if name not in OUTPUT_PROFILES:
+        raise StonksError(ERROR_MESSAGES["unknown_profile"])
+    return OUTPUT_PROFILES[name]
+
+
+def chart_ttl(interval: str) -> float:
+    """Get how long a rendered chart stays fresh: one bar of its finest interval, within bounds."""
+    seconds = INTERVAL_MS[interval] / 1000
+    return min(max(seconds, CACHE_CONFIG["chart_ttl_min"]), CACHE_CONFIG["chart_ttl_max"])
+
+
+async def render_chart_entry(days: Union[str, int], tickers: List[str],
+                             profile: str = "full") -> Tuple[bytes, float]:
+    """Fetch data and render an encoded chart in the worker pool; returns (chart, seconds it stays fresh)."""
+    options = get_output_profile(profile)
+    chart = get_chart_instance()
+    data = await chart.get_chart_data(
+        days, tickers, target_points(FIGURE_SIZE[0], options["dpi"], options["format"])
+    )
+    image = await get_renderer().render(
+        data, options["format"], options["dpi"],
+        options.get("colors"), options.get("quality"), profile=profile
+    )
+    return image, chart_ttl(data.interval)
+
+
+async def get_chart_bytes(days: Union[str, int], tickers: List[str],
+                          profile: str = "full") -> bytes:
+    """Get an encoded chart image, served from the cache when possible."""
+    key = chart_key(days, tickers, profile)
+    # Render exactly the tickers the key names, so every request sharing it gets the same chart
+    return await get_chart_cache().get_or_create(
+        key, lambda: render_chart_entry(days, list(key[1]), profile)
+    )
+
+
+def main(save: bool = False, format: str = 'png', profile: Optional[str] = None) -> None:
     """Main function for command-line usage."""
     try:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        chart = get_chart_instance()
+        
+        # An output profile (--profile=NAME) or format (--format=svgz|html|...) implies saving
+        args = []
+        for arg in sys.argv[1:]:
+            if arg.startswith("--profile="):
+                profile = arg.split("=", 1)[1]
+            elif arg.startswith("--format="):
+                format = arg.split("=", 1)[1]
+                save = True
+            else:
+                args.append(arg)
+        
+        if profile:
+            options = get_output_profile(profile)
+            save = True
+        else:
+            options = {"format": format, "dpi": 300}
+        
+        # Only draw as many points as the output can resolve
+        max_points = target_points(FIGURE_SIZE[0], options["dpi"], options["format"])
         
         # Determine tickers and days
-        if len(sys.argv) == 1:
-            task = get_fig("365", DEFAULT_TICKERS)
-        elif len(sys.argv) == 2:
-            task = get_fig(sys.argv[1], DEFAULT_TICKERS)
+        if len(args) == 0:
+            task = chart.get_chart_data("365", DEFAULT_TICKERS, max_points)
+        elif len(args) == 1:
+            task = chart.get_chart_data(args[0], DEFAULT_TICKERS, max_points)
         else:
-            task = get_fig(sys.argv[1], sys.argv[2:])
+            task = chart.get_chart_data(args[0], args[1:], max_points)
         
-        # Generate the chart
-        fig = loop.run_until_complete(task)
+        # Fetch the chart data
+        data = loop.run_until_complete(task)
         
         if save:
             # Save the chart
-            args = [arg.replace(":", "-") for arg in sys.argv[1:]]
+            name_parts = [arg.replace(":", "-") for arg in args]
             filename = (
                 f"pics/{COMMAND_PREFIX}"
-                + ("_" if args else "")
-                + "_".join(args)
-                + f".{format}"
+                + ("_" if name_parts else "")
+                + "_".join(name_parts)
+                + f".{options['format']}"
             )
             # Create pics directory if it doesn't exist
             os.makedirs("pics", exist_ok=True)
-            plt.savefig(filename, format=format, dpi=300, bbox_inches='tight')
-            print(f"Chart saved as {filename}")
+            from render import render_chart_timed
+            image, _, encode_seconds = render_chart_timed(
+                data, options["format"], options["dpi"],
+                options.get("colors"), options.get("quality")
+            )
+            with open(filename, "wb") as f:
+                f.write(image)
+            print(
+                f"Chart saved as {filename} ({options['format']}, {options['dpi']} dpi, "
+                f"{len(image) / 1024:.0f} KB, encoded in {encode_seconds * 1000:.0f}ms)"
+            )
         else:
             # Display the chart
-            plt.show(block=True)
+            from render import show_chart
+            show_chart(data)
             
     except StonksError as e:
         print(f"Error: {e}")
@@ -386,8 +1053,6 @@ def main(save: bool = False, format: str = 'png') -> None:
     except Exception as e:
         print(f"Unexpected error: {e}")
         sys.exit(1)
-    finally:
-        plt.close("all")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+"""
+Shared test setup for Stonks Bot.
+
+Tests import the bot's top-level modules directly and never touch the
+local price store, the shared cache or a real API key. Provider responses
+come from the benchmark fixtures (benchmarks/fixtures.py).
+"""
+
+import os
+import sys
+
+os.environ["PRICE_STORE_PATH"] = ""
+os.environ["SHARED_CACHE_URL"] = ""
+os.environ.setdefault("POLYGON", "fixture")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,133 @@
+"""
+In-process stand-in for a Redis server, for testing RedisCache.
+
+Speaks just enough RESP for the commands RedisCache sends (AUTH, SELECT,
+GET, SET with PX/NX, PTTL and INCR), keeps its data in a dict and records
+every command it receives. Tests can make a command fail, either with an
+error reply or by applying it and then dropping the connection before
+replying, and can drop every open connection as an idle timeout would.
+"""
+
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """Redis stand-in listening on a free local port."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.port = self.server_address[1]
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands: List[List[bytes]] = []
+        # Command name -> "error" (reply with an error) or "drop" (apply, then close without replying)
+        self.failures: Dict[bytes, str] = {}
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self._connections: List[socket.socket] = []
+
+    def start(self) -> "RespServer":
+        """Serve in a background thread."""
+        threading.Thread(target=self.serve_forever, args=(0.05,), name="resp-server", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close every connection."""
+        self.shutdown()
+        self.drop_connections()
+        self.server_close()
+
+    def drop_connections(self) -> None:
+        """Close every open client connection from the server side."""
+        with self.lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def execute(self, command: List[bytes]) -> bytes:
+        """Apply one command and return its encoded reply."""
+        name, args = command[0].upper(), command[1:]
+        with self.lock:
+            self.commands.append(command)
+            if name in (b"AUTH", b"SELECT"):
+                return b"+OK\r\n"
+            if name == b"GET":
+                entry = self._entry(args[0])
+                return b"$-1\r\n" if entry is None else b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+            if name == b"PTTL":
+                entry = self._entry(args[0])
+                if entry is None:
+                    return b":-2\r\n"
+                return b":-1\r\n" if entry[1] is None else b":%d\r\n" % int((entry[1] - time.time()) * 1000)
+            if name == b"SET":
+                options = [arg.upper() for arg in args[2:]]
+                expires_at = None
+                if b"PX" in options:
+                    expires_at = time.time() + int(args[2 + options.index(b"PX") + 1]) / 1000
+                if b"NX" in options and self._entry(args[0]) is not None:
+                    return b"$-1\r\n"
+                self.data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+            if name == b"INCR":
+                value, expires_at = self._entry(args[0]) or (b"0", None)
+                value = b"%d" % (int(value) + 1)
+                self.data[args[0]] = (value, expires_at)
+                return b":%s\r\n" % value
+            return b"-ERR unknown command '%s'\r\n" % name
+
+    def _entry(self, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        """Get a live entry, dropping it if it has expired."""
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Serves one client connection."""
+
+    def handle(self):
+        with self.server.lock:
+            self.server.accepted += 1
+            self.server._connections.append(self.connection)
+
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+
+            failure = self.server.failures.get(command[0].upper())
+            if failure == "error":
+                with self.server.lock:
+                    self.server.commands.append(command)
+                self.wfile.write(b"-ERR injected failure\r\n")
+                continue
+
+            reply = self.server.execute(command)
+            if failure == "drop":
+                return
+            self.wfile.write(reply)
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        """Read one command sent as a RESP array of bulk strings, or None at end of stream."""
+        try:
+            line = self.rfile.readline()
+            if not line.startswith(b"*"):
+                return None
+            command = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                command.append(self.rfile.read(length + 2)[:-2])
+            return command
+        except (OSError, ValueError):
+            return None
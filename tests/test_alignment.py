@@ -0,0 +1,80 @@
+"""Tests for aligning price series onto a shared time grid."""
+
+import numpy as np
+
+from alignment import align_series
+
+
+def test_single_point_between_columns_is_snapped():
+    grid, matrix = align_series(
+        [np.array([1500]), np.array([0, 1000, 2000, 3000])],
+        [np.array([5.0]), np.array([1.0, 2.0, 3.0, 4.0])]
+    )
+    assert grid.tolist() == [0, 1000, 2000, 3000]
+    # Snapped to the nearest column and held for one more, so it draws as a line
+    assert np.count_nonzero(~np.isnan(matrix[0])) == 2
+    assert np.nanmax(matrix[0]) == 5.0
+    assert matrix[1].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_points_between_columns_are_snapped():
+    grid, matrix = align_series(
+        [np.array([0, 1000, 2000, 3000, 3500]), np.array([1200, 2300])],
+        [np.array([1.0, 2.0, 3.0, 4.0, 5.0]), np.array([6.0, 7.0])]
+    )
+    # The grid is stretched to end at 3500, so neither point lands within the other's columns
+    assert grid.tolist() == [0, 1166, 2333, 3500]
+    assert matrix[1].tolist()[1:3] == [6.0, 7.0]
+
+
+def test_lone_point_on_a_column_is_held():
+    _, matrix = align_series(
+        [np.array([0, 1000, 2000, 3000]), np.array([3000])],
+        [np.array([1.0, 2.0, 3.0, 4.0]), np.array([9.0])]
+    )
+    assert matrix[1].tolist()[2:] == [9.0, 9.0]
+
+
+def test_rows_are_nan_outside_their_range():
+    grid, matrix = align_series(
+        [np.array([0, 1000, 2000, 3000]), np.array([2000, 3000])],
+        [np.array([1.0, 2.0, 3.0, 4.0]), np.array([5.0, 6.0])]
+    )
+    assert grid.tolist() == [0, 1000, 2000, 3000]
+    assert np.isnan(matrix[1, :2]).all()
+    assert matrix[1, 2:].tolist() == [5.0, 6.0]
+
+
+def test_grid_follows_finest_series():
+    grid, _ = align_series(
+        [np.arange(0, 10_001, 1000), np.arange(0, 10_001, 5000)],
+        [np.ones(11), np.ones(3)]
+    )
+    assert len(grid) == 11
+
+
+def test_single_point_series():
+    grid, matrix = align_series([np.array([1000])], [np.array([5.0])])
+    assert grid.tolist() == [1000]
+    assert matrix.tolist() == [[5.0]]
+
+
+def test_dense_series_keep_bucket_extremes():
+    timestamps = np.arange(1000, dtype=np.int64)
+    prices = np.ones(1000)
+    prices[123], prices[456] = 9.0, -9.0
+
+    grid, matrix = align_series([timestamps, timestamps[::10]], [prices, prices[::10]], max_points=100)
+    assert len(grid) == 100
+    assert np.all(np.diff(grid) > 0)
+    assert matrix[0].max() == 9.0
+    assert matrix[0].min() == -9.0
+    # The sparser series is interpolated between its points
+    assert np.isfinite(matrix[1, :-2]).all()
+
+
+def test_bucket_extremes_follow_direction():
+    timestamps = np.arange(100, dtype=np.int64)
+    _, matrix = align_series([timestamps], [np.arange(100, 0, -1, dtype=np.float64)], max_points=10)
+    # A falling series shows each bucket's maximum before its minimum
+    assert np.all(matrix[0, ::2] > matrix[0, 1::2])
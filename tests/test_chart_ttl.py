@@ -0,0 +1,45 @@
+"""Tests for how long rendered charts stay cached."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from chart_cache import ChartCache
+from price_series import PriceSeries
+from stonks import StonksChart, chart_ttl
+
+
+@pytest.mark.parametrize("interval, ttl", [
+    ("minute", 60),
+    ("5minute", 300),
+    ("15minute", 600),
+    ("hour", 600),
+    ("day", 600)
+])
+def test_ttl_follows_bar_interval(interval, ttl):
+    assert chart_ttl(interval) == ttl
+
+
+def test_chart_data_keeps_finest_interval():
+    timestamps = np.arange(0, 48 * 3_600_000, 3_600_000, dtype=np.int64)
+    series = [
+        PriceSeries(timestamps, np.linspace(1, 2, len(timestamps)), "A", "test", "hour"),
+        PriceSeries(timestamps, np.linspace(2, 3, len(timestamps)), "B", "test", "15minute")
+    ]
+    assert StonksChart()._prepare_chart_data(2, series).interval == "15minute"
+
+
+def test_cache_uses_ttl_from_factory():
+    cache = ChartCache(1024)
+
+    async def render():
+        return b"chart", chart_ttl("5minute")
+
+    async def run():
+        value = await cache.get_or_create("key", render)
+        return value, await cache.expires_in("key")
+
+    value, expires_in = asyncio.run(run())
+    assert value == b"chart"
+    assert 290 < expires_in <= 300
@@ -0,0 +1,102 @@
+"""Tests for decoding provider responses, on the benchmark fixtures and through the fixture server."""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from config import SOURCE_CONFIG
+from decoding import decode_coingecko_prices, decode_polygon_bars
+from fixtures import CHART_POINTS, start_server, synthesize
+from stonks import StonksChart, coingecko_interval, polygon_interval
+
+
+@pytest.mark.parametrize("days", [1, 14, 365])
+def test_polygon_fixture(days):
+    body = synthesize("polygon", days)
+    results = json.loads(body)["results"]
+
+    timestamps, closes = decode_polygon_bars(body)
+    assert timestamps.dtype == np.int64
+    assert timestamps.tolist() == [result["t"] for result in results]
+    assert closes.tolist() == [result["c"] for result in results]
+
+
+@pytest.mark.parametrize("days", [1, 14, 365])
+def test_coingecko_fixture(days):
+    body = synthesize("coingecko", days)
+    prices = json.loads(body)["prices"]
+
+    timestamps, values = decode_coingecko_prices(body)
+    assert timestamps.dtype == np.int64
+    assert timestamps.tolist() == [point[0] for point in prices]
+    assert values.tolist() == [point[1] for point in prices]
+
+
+def test_polygon_nested_fields_fall_back():
+    body = b'{"results":[{"t":1,"c":2.5,"extra":{"t":9}},{"t":2,"c":3.5}],"status":"OK"}'
+    timestamps, closes = decode_polygon_bars(body)
+    assert timestamps.tolist() == [1, 2]
+    assert closes.tolist() == [2.5, 3.5]
+
+
+@pytest.mark.parametrize("body", [b'{"status":"OK","resultsCount":0}', b'{"results":[]}'])
+def test_polygon_no_results(body):
+    timestamps, closes = decode_polygon_bars(body)
+    assert len(timestamps) == len(closes) == 0
+
+
+def test_coingecko_null_prices_are_dropped():
+    body = b'{"prices":[[1,2.5],[2,null],[3,4.5]],"market_caps":[]}'
+    timestamps, values = decode_coingecko_prices(body)
+    assert timestamps.tolist() == [1, 3]
+    assert values.tolist() == [2.5, 4.5]
+
+
+@pytest.mark.parametrize("body", [b'{"prices":[]}', b'{"error":"not found"}'])
+def test_coingecko_no_prices(body):
+    timestamps, values = decode_coingecko_prices(body)
+    assert len(timestamps) == len(values) == 0
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server, base_url = start_server()
+    yield base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def chart(base_url):
+    chart = StonksChart()
+    chart.providers["polygon"].base_url = f"{base_url}/v2/aggs"
+    chart.providers["coingecko"].base_url = f"{base_url}/api/v3"
+    return chart
+
+
+@pytest.mark.parametrize("ticker, provider, interval", [
+    ("X:AAPL", "polygon", polygon_interval(14, CHART_POINTS)),
+    ("BTC", "coingecko", coingecko_interval(14))
+])
+def test_fetch_through_fixture_server(chart, ticker, provider, interval):
+    series = asyncio.run(chart.fetch_prices(ticker, 14, CHART_POINTS))
+
+    assert (series.ticker, series.provider, series.interval) == (ticker, provider, interval)
+    assert len(series) > 0
+    assert np.all(np.diff(series.timestamps) > 0)
+    assert np.all(np.isfinite(series.prices))
+
+
+def test_benched_source_falls_back_through_fixture_server(chart):
+    for _ in range(SOURCE_CONFIG["failure_threshold"]):
+        chart.health.record_failure("polygon")
+    series = asyncio.run(chart.fetch_prices("X:BTCUSD", 14, CHART_POINTS))
+    assert (series.ticker, series.provider) == ("X:BTCUSD", "coingecko")
+
+
+def test_chart_data_through_fixture_server(chart):
+    data = asyncio.run(chart.get_chart_data(14, ["X:AAPL", "BTC"], CHART_POINTS))
+    assert data.prices.shape == (2, len(data.timestamps))
+    assert len(data.timestamps) <= CHART_POINTS
+    assert data.interval == polygon_interval(14, CHART_POINTS)
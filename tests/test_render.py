@@ -0,0 +1,60 @@
+"""Tests for drawing and exporting charts from aligned data."""
+
+import warnings
+
+import numpy as np
+import pytest
+
+from chart_data import ChartData
+from html_export import render_html
+from price_series import PriceSeries
+from stonks import StonksChart
+
+render = pytest.importorskip("render")
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def make_series(ticker: str, timestamps, prices) -> PriceSeries:
+    """Build a price series as a provider would return it."""
+    return PriceSeries(np.array(timestamps, dtype=np.int64), np.array(prices, dtype=float),
+                       ticker, "test", "hour")
+
+
+def test_sparse_first_series_renders():
+    hourly = [DAY_MS + hour * 3_600_000 for hour in range(48)]
+    series = [
+        make_series("ONE", [DAY_MS + 5_400_000], [10.0]),
+        make_series("MANY", hourly, np.linspace(100, 200, len(hourly)))
+    ]
+    data = StonksChart()._prepare_chart_data(2, series)
+
+    # Every series has a drawable segment on the grid
+    assert all(np.count_nonzero(~np.isnan(row)) >= 2 for row in data.normalized)
+    image = render.render_chart(data, "png", dpi=50)
+    assert image.startswith(b"\x89PNG")
+
+
+def empty_first_row() -> ChartData:
+    """Chart data whose first series has no point on the grid."""
+    grid = np.arange(0, 10 * DAY_MS, DAY_MS, dtype=np.int64)
+    normalized = np.vstack([np.full(len(grid), np.nan), np.linspace(0.5, 1, len(grid))])
+    return ChartData(
+        days=10, tickers=["EMPTY", "FULL"], prices=normalized * 100, normalized=normalized,
+        timestamps=grid, x_ticks=grid[::3], x_labels=np.array(["a", "b", "c", "d"]),
+        x_limits=(grid[0], grid[-1]), y_min=0.5, interval="day"
+    )
+
+
+def test_empty_first_row_renders_without_price_labels():
+    template = render.FigureTemplate()
+    template.update(empty_first_row())
+    assert all(label.get_text() == "" for label in template.price_labels)
+
+
+def test_html_export_of_empty_row():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        page = render_html(empty_first_row(), ["#fff", "#f00"])
+    assert b"NaN" not in page
+    assert b'"scales":[null,100.0]' in page
@@ -0,0 +1,118 @@
+"""Tests for the Redis shared cache backend, against an in-process RESP stand-in."""
+
+import time
+
+import pytest
+
+from resp_server import RespServer
+from shared_cache import RedisCache, RedisError, open_shared_cache
+
+
+@pytest.fixture
+def server():
+    server = RespServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def cache(server):
+    cache = RedisCache("127.0.0.1", server.port, 0, None, timeout=2)
+    yield cache
+    cache._close()
+
+
+def names(server):
+    return [command[0] for command in server.commands]
+
+
+def test_get_and_set(cache):
+    assert cache.get("missing") is None
+
+    cache.set("key", b"value", 60)
+    value, ttl = cache.get("key")
+    assert value == b"value"
+    assert 59 < ttl <= 60
+
+
+def test_set_expires(cache):
+    cache.set("key", b"value", 0.05)
+    time.sleep(0.1)
+    assert cache.get("key") is None
+
+
+def test_add_only_if_missing(cache):
+    assert cache.add("claim", b"a", 60)
+    assert not cache.add("claim", b"b", 60)
+    assert cache.get("claim")[0] == b"a"
+
+
+def test_incr_counts_and_expires(cache):
+    assert [cache.incr("counter", 0.1) for _ in range(3)] == [1, 2, 3]
+    time.sleep(0.15)
+    assert cache.incr("counter", 0.1) == 1
+
+
+def test_auth_and_select_on_connect(server):
+    cache = RedisCache("127.0.0.1", server.port, 2, "secret", timeout=2)
+    cache.set("key", b"value", 60)
+    assert server.commands[:2] == [[b"AUTH", b"secret"], [b"SELECT", b"2"]]
+    cache._close()
+
+
+def test_reconnects_after_server_closes_idle_connection(server, cache):
+    cache.set("key", b"value", 60)
+    server.drop_connections()
+    time.sleep(0.05)
+
+    assert cache.get("key")[0] == b"value"
+    assert server.accepted == 2
+    # Nothing was resent on the dropped connection
+    assert names(server) == [b"SET", b"GET", b"PTTL"]
+
+
+def test_error_reply_is_not_retried(server, cache):
+    server.failures[b"INCR"] = "error"
+    with pytest.raises(RedisError):
+        cache.incr("counter", 60)
+    assert names(server) == [b"SET", b"INCR"]
+
+    # The connection stays in step and is reused
+    del server.failures[b"INCR"]
+    assert cache.incr("counter", 60) == 1
+    assert server.accepted == 1
+
+
+def test_error_reply_is_a_cache_miss(server, cache):
+    server.failures[b"GET"] = "error"
+    assert cache.get("key") is None
+    assert names(server) == [b"GET", b"PTTL"]
+
+
+def test_incr_not_resent_after_lost_reply(server, cache):
+    server.failures[b"INCR"] = "drop"
+    with pytest.raises(OSError):
+        cache.incr("counter", 60)
+    assert names(server).count(b"INCR") == 1
+
+    # The server counted once; the next call reconnects and counts on from there
+    del server.failures[b"INCR"]
+    assert cache.incr("counter", 60) == 2
+
+
+def test_unreachable_server():
+    server = RespServer()
+    port = server.port
+    server.server_close()
+
+    cache = RedisCache("127.0.0.1", port, 0, None, timeout=0.5)
+    assert cache.get("key") is None
+    assert cache.add("claim", b"a", 60)
+    with pytest.raises(OSError):
+        cache.incr("counter", 60)
+
+
+def test_open_redis_url(server):
+    cache = open_shared_cache(f"redis://:secret@127.0.0.1:{server.port}/3", timeout=2)
+    assert isinstance(cache, RedisCache)
+    assert (cache.port, cache.db, cache.password) == (server.port, 3, "secret")
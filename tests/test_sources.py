@@ -0,0 +1,93 @@
+"""Tests for ranking data sources and routing tickers to them."""
+
+import pytest
+
+from config import SOURCE_CONFIG
+from sources import SourceHealth
+from stonks import StonksChart
+
+
+@pytest.fixture
+def health():
+    return SourceHealth(SOURCE_CONFIG)
+
+
+def bench(health, source):
+    for _ in range(SOURCE_CONFIG["failure_threshold"]):
+        health.record_failure(source)
+
+
+def test_unmeasured_sources_keep_configured_order(health):
+    assert health.rank(["b", "a", "c"]) == ["b", "a", "c"]
+
+
+def test_partly_measured_sources_keep_configured_order(health):
+    health.record_success("c", 0.1)
+    assert health.rank(["b", "a", "c"]) == ["b", "a", "c"]
+
+
+def test_measured_sources_fastest_first(health):
+    for source, seconds in (("a", 0.3), ("b", 0.1), ("c", 0.2)):
+        health.record_success(source, seconds)
+    assert health.rank(["a", "b", "c"]) == ["b", "c", "a"]
+
+
+def test_native_sources_before_translated_ones(health):
+    health.record_success("native", 1.0)
+    health.record_success("translated", 0.01)
+    assert health.rank(["translated", "native"], native=["native"]) == ["native", "translated"]
+
+
+def test_benched_source_goes_last(health):
+    health.record_success("a", 0.1)
+    health.record_success("b", 0.2)
+    bench(health, "a")
+    assert health.rank(["a", "b"]) == ["b", "a"]
+    assert health.rank(["a", "b"], native=["a"]) == ["b", "a"]
+
+
+def test_success_ends_bench(health):
+    bench(health, "a")
+    health.record_success("a", 0.1)
+    assert health.rank(["a", "b"]) == ["a", "b"]
+
+
+def test_hedge_delay(health):
+    assert health.hedge_delay("a") == SOURCE_CONFIG["hedge_delay"]
+    for seconds in (0.5, 0.6, 0.7, 0.8, 0.9):
+        health.record_success("a", seconds)
+    assert health.hedge_delay("a") == 0.9
+    for _ in range(20):
+        health.record_success("b", 0.001)
+    assert health.hedge_delay("b") == SOURCE_CONFIG["hedge_delay_min"]
+
+
+@pytest.fixture
+def chart():
+    return StonksChart()
+
+
+def sources(chart, ticker):
+    return [(provider.name, provider_ticker) for provider, provider_ticker in chart._get_sources(ticker)]
+
+
+@pytest.mark.parametrize("ticker, expected", [
+    ("BTC", [("coingecko", "BTC")]),
+    ("X:AAPL", [("polygon", "X:AAPL")]),
+    ("X:BTCUSD", [("polygon", "X:BTCUSD"), ("coingecko", "BTC")])
+])
+def test_routes(chart, ticker, expected):
+    assert sources(chart, ticker) == expected
+
+
+def test_faster_translated_source_stays_second(chart):
+    chart.health.record_success("polygon", 1.0)
+    chart.health.record_success("coingecko", 0.01)
+    assert [name for name, _ in sources(chart, "X:BTCUSD")] == ["polygon", "coingecko"]
+
+
+def test_benched_native_source_falls_back(chart):
+    bench(chart.health, "polygon")
+    assert sources(chart, "X:BTCUSD") == [("coingecko", "BTC"), ("polygon", "X:BTCUSD")]
+    # Unranked, the configured order is kept
+    assert chart._get_sources("X:BTCUSD", ranked=False)[0][0].name == "polygon"
@@ -0,0 +1,136 @@
+"""
+Hot-chart warmer for the Stonks Discord bot.
+
+Counts how often each chart is requested and keeps the most popular ones
+rendered in the chart cache. Each hot chart is re-rendered shortly before
+its cache entry expires. A chart stays fresh for one bar of the finest
+interval it was drawn from (at least a minute, at most ten), so a chart
+of minute bars is refreshed every minute and one of hourly or daily bars
+every ten minutes.
+Popular commands are then answered straight from the cache without a
+fetch or render on the critical path. When several bot processes share a
+cache, each hot chart is claimed and re-rendered by one of them only.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from config import WARMER_CONFIG
+from profiles import choose_profile
+from stonks import DEFAULT_TICKERS, chart_key, get_chart_cache, render_chart_entry
+
+logger = logging.getLogger(__name__)
+
+
+class ChartWarmer:
+    """Background task that keeps the most requested charts rendered."""
+
+    def __init__(self, top_n: int, check_interval: float, refresh_margin: float,
+                 decay_seconds: float, retry_seconds: float):
+        self.top_n = top_n
+        self.check_interval = check_interval
+        self.refresh_margin = refresh_margin
+        self.decay_seconds = decay_seconds
+        self.retry_seconds = retry_seconds
+        self.counts: Counter = Counter()
+        self._commands: Dict[Hashable, Tuple[str, List[str]]] = {}
+        self._retry_at: Dict[Hashable, float] = {}
+        self._decayed_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+        # The default command is always worth keeping warm
+        self.record("365", DEFAULT_TICKERS)
+
+    def record(self, days: str, tickers: List[str]) -> None:
+        """Count one request for a chart."""
+        # Counted per command, whichever output profile it was sent with
+        command = chart_key(days, tickers)[:2]
+        self.counts[command] += 1
+        self._commands.setdefault(command, (days, list(command[1])))
+
+    def hot(self) -> List[Hashable]:
+        """Get the most requested commands."""
+        return [key for key, _ in self.counts.most_common(self.top_n)]
+
+    def start(self) -> None:
+        """Start the warmer on the running event loop if it is not running yet."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        """Stop the warmer."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def warm(self) -> None:
+        """Re-render every hot chart that is missing or about to expire."""
+        cache = get_chart_cache()
+        now = time.monotonic()
+
+        for command in self.hot():
+            days, tickers = self._commands[command]
+            # Warm the profile the bot would pick for this command right now
+            profile = choose_profile()
+            key = chart_key(days, tickers, profile)
+
+            expires_in = await cache.expires_in(key)
+            if expires_in is not None and expires_in > self.refresh_margin:
+                continue
+            if self._retry_at.get(key, 0) > now:
+                continue
+            # With several bot processes, only one re-renders each chart
+            if not await cache.claim(key, self.refresh_margin):
+                continue
+
+            try:
+                # One chart at a time so user commands keep most of the capacity
+                await cache.refresh(key, lambda: render_chart_entry(days, tickers, profile))
+                self._retry_at.pop(key, None)
+            except Exception as e:
+                logger.warning(f"Could not warm chart for {days} days {tickers}: {e}")
+                self._retry_at[key] = now + self.retry_seconds
+
+    async def _run(self) -> None:
+        """Warm hot charts until cancelled."""
+        while True:
+            self._decay()
+            await self.warm()
+            await asyncio.sleep(self.check_interval)
+
+    def _decay(self) -> None:
+        """Halve all counts periodically so popularity follows recent traffic."""
+        if time.monotonic() - self._decayed_at < self.decay_seconds:
+            return
+        self._decayed_at = time.monotonic()
+
+        for command in list(self.counts):
+            self.counts[command] //= 2
+            if self.counts[command] == 0:
+                del self.counts[command]
+                self._commands.pop(command, None)
+        self._retry_at = {key: at for key, at in self._retry_at.items() if at > time.monotonic()}
+
+        # Keep the default command even when nobody has asked for it lately
+        self.record("365", DEFAULT_TICKERS)
+
+
+# Global warmer instance
+_warmer_instance = None
+
+
+def get_warmer() -> ChartWarmer:
+    """Get or create the global chart warmer."""
+    global _warmer_instance
+    if _warmer_instance is None:
+        _warmer_instance = ChartWarmer(
+            top_n=WARMER_CONFIG["top_n"],
+            check_interval=WARMER_CONFIG["check_interval"],
+            refresh_margin=WARMER_CONFIG["refresh_margin"],
+            decay_seconds=WARMER_CONFIG["decay_seconds"],
+            retry_seconds=WARMER_CONFIG["retry_seconds"]
+        )
+    return _warmer_instance